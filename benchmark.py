@@ -0,0 +1,427 @@
+"""Benchmark beban untuk API Objek Wisata.
+
+Menjalankan web hosting tiruan untuk pajak, tourguide, asuransi, hotel dan bank di mesin lokal (isi data
+deterministik, latensi dan tingkat error bisa diatur), mengisi tabel wisata dengan N baris, menjalankan
+main:app lewat uvicorn, lalu menembak setiap endpoint dengan konkurensi tertentu dan melaporkan
+throughput serta p50/p95/p99. Hasil bisa disimpan sebagai JSON dan dibandingkan dengan run sebelumnya.
+
+Gunakan database khusus benchmark: baris wisata dengan id BW000000.. akan ditulis (upsert) ke DB_NAME.
+Dengan --writes endpoint tulis ikut diuji; semua penulisan tetap di rentang id BW (BWP.. dibuat lalu
+dihapus lagi oleh POST/DELETE, BWB.. ditulis ulang oleh impor massal, BW000000.. ditulis ulang oleh PUT).
+
+Contoh:
+    DB_HOST=127.0.0.1 DB_PORT=3306 DB_USER=root DB_PASSWORD=rahasia DB_NAME=wisata_bench \\
+        python benchmark.py --rows 5000 --upstream-rows 500 --concurrency 32 --duration 10 --json hasil.json
+    python benchmark.py --baseline hasil.json --json hasil_baru.json --endpoints "wisataHotel|/hotel"
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import orjson
+
+REGIONS = ["Bali", "Yogyakarta", "Bandung", "Malang", "Lombok", "Labuan Bajo", "Toba", "Bromo", "Raja Ampat", "Belitung"]
+CATEGORIES = ["alam", "budaya", "sejarah", "kuliner", "religi", "edukasi"]
+OBJECTS = ["Pantai", "Candi", "Gunung", "Danau", "Museum", "Air Terjun"]
+SEARCH_TERMS = ["pantai", "candi", "gunung", "danau", "museum", "terjun", "bali", "bromo", "budaya", "kuliner"]
+
+# Path setiap web hosting tiruan -> variabel lingkungan URL yang dibaca main.py
+UPSTREAM_PATHS = {
+    "pajak": ("/pajak", "UPSTREAM_URL_PAJAK"),
+    "tourguide": ("/tourguide", "UPSTREAM_URL_TOURGUIDE"),
+    "asuransi": ("/asuransi", "UPSTREAM_URL_ASURANSI"),
+    "hotel": ("/rooms", "UPSTREAM_URL_HOTEL"),
+    "bank": ("/api/obj-wisata", "UPSTREAM_URL_BANK"),
+}
+
+
+# Data tiruan yang sama persis untuk seed yang sama, agar hasil antar run bisa dibandingkan
+def make_payloads(rows, seed):
+    rng = random.Random(seed)
+    return {
+        "pajak": [{
+            "id_pajak": f"PJ{i:05d}",
+            "status_kepemilikan": rng.choice(["pemerintah", "swasta", "desa"]),
+            "jenis_pajak": rng.choice(["PBB", "hiburan", "restoran", "hotel", "parkir"]),
+            "tarif_pajak": round(rng.uniform(0.05, 0.35), 2),
+            "besar_pajak": float(rng.randrange(100_000, 50_000_000, 1000)),
+        } for i in range(rows)],
+        "tourguide": [{
+            "id_guider": f"TG{i:05d}",
+            "nama_guider": f"Pemandu {i}",
+            "profile": "Berpengalaman " + "di " * rng.randint(5, 40) + rng.choice(REGIONS),
+            "fee": rng.randrange(100_000, 1_500_000, 50_000),
+            "status_ketersediaan": rng.choice(["tersedia", "tidak tersedia"]),
+        } for i in range(rows)],
+        "asuransi": [{
+            "id_asuransi": f"AS{i:05d}",
+            "jenis_asuransi": rng.choice(["kecelakaan", "kesehatan", "perjalanan", "jiwa"]),
+        } for i in range(rows)],
+        "hotel": [{
+            "RoomID": f"RM{i:05d}",
+            "RoomNumber": str(100 + i),
+            "RoomType": rng.choice(["standard", "deluxe", "suite"]),
+            "Rate": rng.randrange(250_000, 5_000_000, 25_000),
+            "Availability": rng.choice(["available", "booked"]),
+        } for i in range(rows)],
+        "bank": [{
+            "id": i + 1,
+            "saldo": rng.randrange(0, 1_000_000_000, 1000),
+            "active_date": "2024-01-01",
+            "expired_date": "2029-12-31",
+        } for i in range(rows)],
+    }
+
+
+def make_wisata_rows(rows, payloads, seed):
+    rng = random.Random(seed + 1)
+
+    # Sekitar 10% baris tanpa relasi, supaya join inner dan left sama-sama teruji
+    def relation(name, key):
+        return rng.choice(payloads[name])[key] if payloads[name] and rng.random() > 0.1 else None
+
+    return [{
+        "id_wisata": f"BW{i:06d}",
+        "nama_objek": f"{rng.choice(OBJECTS)} {i}",
+        "nama_daerah": rng.choice(REGIONS),
+        "kategori": rng.choice(CATEGORIES),
+        "alamat": f"Jl. Wisata No. {i}",
+        "kontak": f"08{rng.randrange(10**9, 10**10)}",
+        "harga_tiket": rng.randrange(0, 500_000, 5000),
+        "id_pajak": relation("pajak", "id_pajak"),
+        "id_guider": relation("tourguide", "id_guider"),
+        "id_asuransi": relation("asuransi", "id_asuransi"),
+        "RoomID": relation("hotel", "RoomID"),
+        "id_bank": relation("bank", "id"),
+    } for i in range(rows)]
+
+
+# Web hosting tiruan: satu server HTTP untuk semua sumber, dengan latensi dan error yang bisa disuntikkan
+class StandInUpstreams:
+    def __init__(self, payloads, latency, jitter, error_rate, seed):
+        self.bodies = {}
+        for name, (path, _) in UPSTREAM_PATHS.items():
+            data = {"data": {"data": payloads[name]}} if name == "bank" else payloads[name]
+            self.bodies[path] = orjson.dumps(data)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed + 2)
+        self.lock = threading.Lock()
+        self.hits = {path: 0 for path in self.bodies}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+
+    def _handler(self):
+        upstreams = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                body = upstreams.bodies.get(self.path)
+                with upstreams.lock:
+                    delay = upstreams.latency + upstreams.rng.uniform(0, upstreams.jitter)
+                    gagal = upstreams.rng.random() < upstreams.error_rate
+                    if body is not None:
+                        upstreams.hits[self.path] += 1
+                time.sleep(delay)
+                if body is None or gagal:
+                    body = b'{"detail":"error tiruan"}' if body is not None else b'{"detail":"not found"}'
+                    self.send_response(500 if gagal else 404)
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def env(self):
+        return {variable: self.base_url + path for path, variable in UPSTREAM_PATHS.values()}
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+# Isi tabel wisata lewat migrasi dan query upsert yang sama dengan main.py
+def seed_database(wisata_rows):
+    import main
+
+    conn = main.get_db_connection()
+    try:
+        main.run_migrations(conn)
+        cursor = conn.cursor()
+        values = [tuple(row[column] for column in main.WISATA_COLUMNS) for row in wisata_rows]
+        for start in range(0, len(values), 1000):
+            cursor.executemany(main.WISATA_UPSERT, values[start:start + 1000])
+            conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def start_app(port, workers, extra_env):
+    env = {**os.environ, **extra_env}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn berhenti dengan kode {process.returncode}")
+        try:
+            if httpx.get(base_url + "/ready", timeout=2).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("Aplikasi belum siap setelah 60 detik (cek koneksi database).")
+
+
+# Daftar endpoint: (nama, method, fungsi pembuat request dari rng) -> (path, body JSON)
+def build_endpoints(wisata_rows, payloads, writes, bulk_rows):
+    ids = [row["id_wisata"] for row in wisata_rows]
+
+    def pick(rng, values, n):
+        return [rng.choice(values) for _ in range(n)]
+
+    endpoints = [
+        ("GET /", "GET", lambda rng: ("/", None)),
+        ("GET /wisata", "GET", lambda rng: ("/wisata?limit=100", None)),
+        ("GET /wisata?nama_daerah", "GET", lambda rng: (f"/wisata?nama_daerah={rng.choice(REGIONS)}&sort=harga_tiket", None)),
+        ("GET /wisata/{id}", "GET", lambda rng: (f"/wisata/{rng.choice(ids)}", None)),
+        ("GET /wisata?ids", "GET", lambda rng: ("/wisata?ids=" + ",".join(pick(rng, ids, 20)), None)),
+        ("POST /wisata/_mget", "POST", lambda rng: ("/wisata/_mget", {"ids": pick(rng, ids, 50)})),
+        ("GET /wisata/{id}/lengkap", "GET", lambda rng: (f"/wisata/{rng.choice(ids)}/lengkap", None)),
+        ("GET /wisata/search", "GET", lambda rng: (f"/wisata/search?q={rng.choice(SEARCH_TERMS)}", None)),
+        ("GET /wisata/search?prefix", "GET", lambda rng: (f"/wisata/search?q={rng.choice(SEARCH_TERMS)[:3]}", None)),
+        ("GET /wisata/search?filter", "GET", lambda rng: (
+            f"/wisata/search?q={rng.choice(SEARCH_TERMS)}&nama_daerah={rng.choice(REGIONS)}&harga_max=250000", None)),
+    ]
+    endpoints += [
+        (f"GET /stats/{dimension}", "GET", lambda rng, dimension=dimension: (f"/stats/{dimension}", None))
+        for dimension in ("total", "daerah", "kategori", "jenis_pajak")
+    ]
+    resources = [
+        ("pajak", "/pajak", "id_pajak", "/wisataPajak"),
+        ("tourguide", "/tourGuide", "id_guider", "/wisataTourGuide"),
+        ("asuransi", "/asuransi", "id_asuransi", "/wisataAsuransi"),
+        ("hotel", "/hotel", "RoomID", "/wisataHotel"),
+        ("bank", "/bank", "id", "/wisataBank"),
+    ]
+    for name, path, key, join_path in resources:
+        keys = [row[key] for row in payloads[name]] or [0]
+        endpoints += [
+            (f"GET {path}", "GET", lambda rng, path=path: (path, None)),
+            (f"GET {path}/{{id}}", "GET", lambda rng, path=path, keys=keys: (f"{path}/{rng.choice(keys)}", None)),
+            (f"POST {path}/_mget", "POST", lambda rng, path=path, keys=keys: (f"{path}/_mget", {"ids": pick(rng, keys, 50)})),
+            (f"GET {join_path}", "GET", lambda rng, join_path=join_path: (join_path, None)),
+            (f"GET {join_path}?how=left", "GET", lambda rng, join_path=join_path: (join_path + "?how=left", None)),
+            (f"GET {join_path}/{{id}}", "GET", lambda rng, join_path=join_path, keys=keys: (f"{join_path}/{rng.choice(keys)}", None)),
+        ]
+    endpoints += [
+        ("GET /export/wisata", "GET", lambda rng: ("/export/wisata", None)),
+        ("GET /export/wisataHotel", "GET", lambda rng: ("/export/wisataHotel", None)),
+        ("GET /metrics", "GET", lambda rng: ("/metrics", None)),
+    ]
+    if writes:
+        by_id = {row["id_wisata"]: row for row in wisata_rows}
+
+        def put_wisata(rng):
+            id_wisata = rng.choice(ids)
+            return f"/wisata/{id_wisata}", by_id[id_wisata]
+
+        # POST membuat id baru BWP<run><n>, DELETE menghapus id yang sudah dibuat POST (urutan endpoint dijaga)
+        run = f"{int(time.time()) % 10**6:06d}"
+        counter, created = itertools.count(), []
+
+        def post_wisata(rng):
+            id_wisata = f"BWP{run}{next(counter):07d}"
+            created.append(id_wisata)
+            return "/wisata", {**rng.choice(wisata_rows), "id_wisata": id_wisata}
+
+        def delete_wisata(rng):
+            id_wisata = created.pop() if created else f"BWP{run}{next(counter):07d}"
+            return f"/wisata/{id_wisata}", None
+
+        # Impor massal: setiap worker driver menulis ulang rentang id BWB miliknya sendiri,
+        # sehingga upsert yang berjalan bersamaan tidak saling mengunci baris yang sama
+        slots = {}
+
+        def bulk_wisata(rng):
+            slot = slots.setdefault(id(rng), len(slots))
+            return "/wisata/bulk", [
+                {**wisata_rows[i % len(wisata_rows)], "id_wisata": f"BWB{slot:03d}{i:06d}"} for i in range(bulk_rows)
+            ]
+
+        endpoints += [
+            ("PUT /wisata/{id}", "PUT", put_wisata),
+            ("POST /wisata", "POST", post_wisata),
+            ("DELETE /wisata/{id}", "DELETE", delete_wisata),
+            ("POST /wisata/bulk", "POST", bulk_wisata),
+        ]
+    return endpoints
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def drive(client, method, make_request, concurrency, duration, warmup, seed):
+    latencies, errors, statuses = [], 0, {}
+
+    async def worker(index):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + index)
+        started = time.perf_counter()
+        while True:
+            now = time.perf_counter()
+            if now - started >= warmup + duration:
+                return
+            path, body = make_request(rng)
+            try:
+                response = await client.request(method, path, json=body)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "error"
+            elapsed = time.perf_counter() - now
+            if now - started < warmup:
+                continue
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == "error" or status >= 400:
+                errors += 1
+            latencies.append(elapsed)
+
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 0.50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 0.95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else None,
+    }
+
+
+async def run_benchmark(base_url, endpoints, args):
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        for name, method, make_request in endpoints:
+            results[name] = await drive(client, method, make_request, args.concurrency, args.duration, args.warmup, args.seed)
+            print_row(name, results[name], None)
+    return results
+
+
+def format_ms(value):
+    return f"{value:9.1f}" if value is not None else "        -"
+
+
+def print_row(name, result, baseline):
+    line = f"{name:<38} {result['requests']:>8} {result['errors']:>6} {result['rps']:>9.1f} {format_ms(result['p50_ms'])} {format_ms(result['p95_ms'])} {format_ms(result['p99_ms'])}"
+    if baseline and baseline.get("p95_ms") and result["p95_ms"] and baseline.get("rps"):
+        line += f"   rps {100 * (result['rps'] / baseline['rps'] - 1):+6.1f}%  p95 {100 * (result['p95_ms'] / baseline['p95_ms'] - 1):+6.1f}%"
+    print(line, flush=True)
+
+
+def print_header():
+    print(f"{'endpoint':<38} {'requests':>8} {'errors':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark beban API Objek Wisata dengan web hosting tiruan lokal.")
+    parser.add_argument("--rows", type=int, default=1000, help="jumlah baris wisata yang di-seed")
+    parser.add_argument("--upstream-rows", type=int, default=200, help="jumlah baris per web hosting tiruan")
+    parser.add_argument("--latency", type=float, default=50, help="latensi dasar web hosting tiruan (ms)")
+    parser.add_argument("--jitter", type=float, default=20, help="tambahan latensi acak web hosting tiruan (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proporsi respons 500 dari web hosting tiruan")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5, help="detik pengukuran per endpoint")
+    parser.add_argument("--warmup", type=float, default=1, help="detik pemanasan per endpoint (tidak diukur)")
+    parser.add_argument("--timeout", type=float, default=30, help="timeout per request (detik)")
+    parser.add_argument("--workers", type=int, default=1, help="jumlah worker uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--endpoints", help="regex untuk memilih endpoint yang dijalankan")
+    parser.add_argument("--writes", action="store_true", help="ikut uji endpoint tulis: PUT, POST, DELETE /wisata dan POST /wisata/bulk (hanya id BW..)")
+    parser.add_argument("--bulk-rows", type=int, default=500, help="jumlah baris per request POST /wisata/bulk")
+    parser.add_argument("--skip-seed", action="store_true", help="jangan isi ulang tabel wisata")
+    parser.add_argument("--target", help="URL aplikasi yang sudah berjalan; aplikasi tidak dijalankan oleh benchmark")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    parser.add_argument("--baseline", help="file JSON hasil run sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.upstream_rows, args.seed)
+    wisata_rows = make_wisata_rows(args.rows, payloads, args.seed)
+    upstreams = StandInUpstreams(payloads, args.latency / 1000, args.jitter / 1000, args.error_rate, args.seed).start()
+    os.environ.update(upstreams.env())
+    if not args.skip_seed:
+        seed_database(wisata_rows)
+
+    process = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            process, base_url = start_app(args.port, args.workers, upstreams.env())
+        endpoints = build_endpoints(wisata_rows, payloads, args.writes, args.bulk_rows)
+        if args.endpoints:
+            endpoints = [endpoint for endpoint in endpoints if re.search(args.endpoints, endpoint[0])]
+        baseline = {}
+        if args.baseline:
+            with open(args.baseline, "rb") as f:
+                baseline = orjson.loads(f.read())["results"]
+
+        print_header()
+        results = asyncio.run(run_benchmark(base_url, endpoints, args))
+        if baseline:
+            print("\nDibandingkan dengan", args.baseline)
+            print_header()
+            for name, result in results.items():
+                print_row(name, result, baseline.get(name))
+        print("\nRequest ke web hosting tiruan:", {path: hits for path, hits in upstreams.hits.items()})
+
+        if args.json:
+            config = {key: value for key, value in vars(args).items() if key not in ("json", "baseline", "target")}
+            with open(args.json, "wb") as f:
+                f.write(orjson.dumps({"config": config, "upstream_hits": upstreams.hits, "results": results}, option=orjson.OPT_INDENT_2))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        upstreams.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,236 @@
-import requests
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from itertools import zip_longest
+from typing import Dict, List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.datastructures import Headers, MutableHeaders
+from pydantic import BaseModel, TypeAdapter, ValidationError
 import mysql.connector
+import mysql.connector.pooling
+from collections import OrderedDict, deque
+from types import MappingProxyType
 from itertools import product
+from cachetools import TTLCache
+from array import array
+from bisect import bisect_left, insort
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+import anyio
+import asyncio
+import contextvars
+import base64
+import fcntl
+import hashlib
+import heapq
+import csv
+import httpx
+import importlib.util
+import logging
+import mmap
+import orjson
+import re
 import os
+import socket
+import threading
+import time
+import unicodedata
+import zlib
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger("wisata")
+
+# Metrik latensi format teks Prometheus tanpa dependensi tambahan. Histogram disimpan per kombinasi label
+# (hitungan per bucket + jumlah), dirender kumulatif saat /metrics dibaca.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS = []
+
+def metric_labels(names, values, extra=""):
+    pairs = [f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}  # nilai label -> [hitungan per bucket..., +Inf, jumlah]
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (None,), values):
+                cumulative += count
+                le = 'le="+Inf"' if bound is None else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{metric_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{metric_labels(self.labels, labels)} {values[-1]}")
+            lines.append(f"{self.name}_count{metric_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, amount, *labels):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = dict(self._series)
+        for labels, value in sorted(series.items()):
+            lines.append(f"{self.name}{metric_labels(self.labels, labels)} {value}")
+        return lines
+
+http_request_seconds = Histogram("wisata_http_request_duration_seconds", "Latensi request per route.", ("method", "route", "status"))
+db_pool_wait_seconds = Histogram("wisata_db_pool_wait_seconds", "Waktu menunggu koneksi dari pool.", ())
+db_query_seconds = Histogram("wisata_db_query_duration_seconds", "Latensi query MySQL per jenis perintah dan fase.", ("operation", "phase"))
+upstream_request_seconds = Histogram("wisata_upstream_request_duration_seconds", "Latensi request ke web hosting lain.", ("source", "status"))
+upstream_response_bytes = Counter("wisata_upstream_response_bytes_total", "Jumlah byte respons dari web hosting lain.", ("source",))
+admission_wait_seconds = Histogram("wisata_admission_wait_seconds", "Waktu menunggu giliran di antrean admission control.", ("dependency",))
+admission_shed_total = Counter("wisata_admission_shed_total", "Request yang ditolak admission control.", ("dependency", "reason"))
+cache_lookup_seconds = Histogram("wisata_cache_lookup_duration_seconds", "Latensi lookup cache, termasuk pemuatan saat miss.", ("cache", "result"))
+join_seconds = Histogram("wisata_join_duration_seconds", "Waktu hash join dan pembuatan model hasil join.", ("source",))
+
+# Waktu per fase (db, upstream, cache, ...) milik request yang sedang berjalan, untuk header Server-Timing.
+# Dict-nya ikut tersalin ke thread pool dan task asyncio, jadi semua hook menulis ke dict yang sama.
+request_timings = contextvars.ContextVar("request_timings", default=None)
+
+def record_timing(phase, seconds):
+    timings = request_timings.get()
+    if timings is not None:
+        total, count = timings.get(phase, (0.0, 0))
+        timings[phase] = (total + seconds, count + 1)
+
+def observe_cache(cache, result, started):
+    elapsed = time.perf_counter() - started
+    cache_lookup_seconds.observe(elapsed, cache, result)
+    record_timing("cache", elapsed)
+
+# Cursor MySQL yang mencatat lama eksekusi dan pembacaan hasil setiap query
+class TimedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._operation = "other"
+
+    def _timed(self, phase, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            db_query_seconds.observe(elapsed, self._operation, phase)
+            record_timing("db", elapsed)
+
+    def execute(self, operation, *args, **kwargs):
+        self._operation = operation.split(None, 1)[0].lower() if operation.strip() else "other"
+        return self._timed("execute", self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        self._operation = operation.split(None, 1)[0].lower() if operation.strip() else "other"
+        return self._timed("execute", self._cursor.executemany, operation, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed("fetch", self._cursor.fetchall)
+
+    def fetchone(self):
+        return self._timed("fetch", self._cursor.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed("fetch", self._cursor.fetchmany, *args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._cursor, attr)
+
+class TimedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+        self.admission = None  # (bulkhead, waktu mulai) bila dipinjam lewat admission control
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, attr):
+        return getattr(self._conn, attr)
+
+# Middleware ASGI: histogram latensi per route (template path, bukan path mentah) dan header Server-Timing opsional
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '0') == '1'
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = {}
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    entries = [f'{phase};dur={total * 1000:.1f};desc="{count}x"' for phase, (total, count) in timings.items()]
+                    entries.append(f"total;dur={(time.perf_counter() - started) * 1000:.1f}")
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", ", ".join(entries).encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(time.perf_counter() - started, scope["method"], getattr(route, "path", "unmatched"), str(status))
+            request_timings.reset(token)
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    # Angka pool dan cache yang sudah ada ikut diekspor sebagai gauge
+    for key, value in db_pool.snapshot().items():
+        lines.append(f"# TYPE wisata_db_pool_{key} gauge")
+        lines.append(f"wisata_db_pool_{key} {value}")
+    for key, value in upstream_cache.stats.items():
+        lines.append(f"# TYPE wisata_upstream_cache_{key} gauge")
+        lines.append(f"wisata_upstream_cache_{key} {value}")
+    for key, value in compression_stats.items():
+        lines.append(f"# TYPE wisata_compression_{key} gauge")
+        lines.append(f"wisata_compression_{key} {value}")
+    for key, value in wisata_cache.stats.items():
+        lines.append(f"# TYPE wisata_row_cache_{key} gauge")
+        lines.append(f"wisata_row_cache_{key} {value}")
+    for key in ("active", "queue_depth"):
+        lines.append(f"# TYPE wisata_admission_{key} gauge")
+        for name, bulkhead in BULKHEADS.items():
+            lines.append(f"wisata_admission_{key}{metric_labels(('dependency',), (name,))} {bulkhead.snapshot()[key]}")
+    return "\n".join(lines) + "\n"
+
+
 
 def get_db_connection():
     conn = mysql.connector.connect(
@@ -20,6 +242,788 @@ def get_db_connection():
     )
     return conn
 
+# Pool koneksi MySQL: koneksi dipakai ulang antar request, bukan connect baru setiap kali
+class DatabasePool:
+    def __init__(self, size, timeout, recycle):
+        self.size = size
+        self.timeout = timeout      # detik maksimal menunggu koneksi kosong
+        self.recycle = recycle      # detik umur maksimal koneksi sebelum dibuka ulang
+        self._pool = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._created = {}
+        self.stats = {"checkouts": 0, "waits": 0, "timeouts": 0, "recycled": 0, "in_use": 0}
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = mysql.connector.pooling.MySQLConnectionPool(
+                        pool_name="wisata",
+                        pool_size=self.size,
+                        pool_reset_session=True,
+                        host=os.environ.get('DB_HOST'),
+                        user=os.environ.get('DB_USER'),
+                        password=os.environ.get('DB_PASSWORD'),
+                        database=os.environ.get('DB_NAME'),
+                        port=os.environ.get('DB_PORT')
+                    )
+        return self._pool
+
+    def _count(self, key, delta=1):
+        with self._stats_lock:
+            self.stats[key] += delta
+
+    def acquire(self):
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            self._count("waits")
+            if not self._slots.acquire(timeout=self.timeout):
+                self._count("timeouts")
+                raise HTTPException(status_code=503, detail="Koneksi database sedang penuh, silakan coba lagi.", headers={"Retry-After": "1"})
+        try:
+            # get_connection() sudah melakukan ping (is_connected) dan reconnect bila koneksi putus
+            conn = self._get_pool().get_connection()
+        except mysql.connector.Error as e:
+            self._slots.release()
+            raise HTTPException(status_code=503, detail=f"Database tidak dapat dihubungi: {e}", headers={"Retry-After": "5"})
+        try:
+            self._recycle(conn)
+        except mysql.connector.Error as e:
+            # Lupakan umur koneksi ini: pool sendiri yang reconnect saat checkout berikutnya
+            self._created.pop(id(conn._cnx), None)
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+            finally:
+                self._slots.release()
+            raise HTTPException(status_code=503, detail=f"Database tidak dapat dihubungi: {e}", headers={"Retry-After": "5"})
+        self._count("checkouts")
+        self._count("in_use")
+        elapsed = time.perf_counter() - started
+        db_pool_wait_seconds.observe(elapsed)
+        record_timing("db_pool", elapsed)
+        return TimedConnection(conn)
+
+    # Daur ulang koneksi yang sudah terlalu lama hidup (misal sebelum kena wait_timeout server)
+    def _recycle(self, conn):
+        cnx = conn._cnx
+        now = time.monotonic()
+        created = self._created.get(id(cnx))
+        if created is not None and now - created > self.recycle:
+            cnx.disconnect()
+            cnx.reconnect()
+            self._count("recycled")
+            created = None
+        if created is None:
+            self._created[id(cnx)] = now
+
+    def release(self, conn, discard=False):
+        try:
+            if discard:
+                # Koneksi dengan hasil query yang belum habis dibaca: putuskan, pool akan reconnect saat checkout berikutnya
+                self._created.pop(id(conn._cnx), None)
+                try:
+                    conn._cnx.disconnect()
+                    conn.close()
+                except mysql.connector.Error:
+                    pass
+            else:
+                conn.close()
+        finally:
+            self._count("in_use", -1)
+            self._slots.release()
+
+    def snapshot(self):
+        with self._stats_lock:
+            return {"size": self.size, "timeout": self.timeout, "recycle": self.recycle, "available": self.size - self.stats["in_use"], **self.stats}
+
+db_pool = DatabasePool(
+    size=int(os.environ.get('DB_POOL_SIZE', 5)),
+    timeout=float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+    recycle=float(os.environ.get('DB_POOL_RECYCLE', 1800)),
+)
+
+# Admission control per kelas dependency (bulkhead): database dan tiap sumber upstream punya batas
+# konkurensi sendiri, antrean terbatas dan tenggat tunggu. Request yang tidak mungkin mulai sebelum
+# tenggatnya langsung ditolak 503 + Retry-After, bukan menunggu sampai klien timeout, sehingga satu
+# dependency yang lambat tidak menghabiskan worker untuk request lain.
+# Semua operasi berjalan di event loop (kode thread memanggilnya lewat call_in_loop), jadi tanpa lock.
+BULKHEADS = {}
+
+class Bulkhead:
+    def __init__(self, name, limit, queue, deadline):
+        self.name = name
+        self.limit = limit          # jumlah request yang boleh berjalan bersamaan
+        self.queue = queue          # jumlah request yang boleh menunggu giliran
+        self.deadline = deadline    # detik maksimal menunggu giliran
+        self.active = 0
+        self.hold = None            # rata-rata (EWMA) lama satu slot dipakai, untuk memperkirakan waktu tunggu
+        self._waiters = deque()
+        self.stats = {"admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_deadline": 0, "max_queue_depth": 0}
+        BULKHEADS[name] = self
+
+    def expected_wait(self):
+        if self.hold is None:
+            return 0.0
+        return (len(self._waiters) + 1) * self.hold / self.limit
+
+    def _shed(self, reason):
+        self.stats[f"shed_{reason}"] += 1
+        admission_shed_total.inc(1, self.name, reason)
+        retry_after = max(1, round(min(self.expected_wait(), self.deadline)))
+        raise HTTPException(status_code=503, detail=f"Layanan {self.name} sedang penuh, silakan coba lagi.", headers={"Retry-After": str(retry_after)})
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.stats["admitted"] += 1
+            return
+        if len(self._waiters) >= self.queue:
+            self._shed("queue_full")
+        # Tolak lebih awal bila perkiraan waktu tunggu sudah melewati tenggat
+        if self.expected_wait() > self.deadline:
+            self._shed("deadline")
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._waiters))
+        try:
+            await asyncio.wait((waiter,), timeout=self.deadline)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        admission_wait_seconds.observe(time.perf_counter() - started, self.name)
+        if waiter.done():
+            self.stats["admitted"] += 1
+            return
+        self._abandon(waiter)
+        self._shed("deadline")
+
+    # Waiter batal (tenggat habis atau request dibatalkan); bila slot sudah terlanjur diberikan, lepaskan lagi
+    def _abandon(self, waiter):
+        if waiter.done():
+            if not waiter.cancelled():
+                self.release()
+            return
+        waiter.cancel()
+        self._waiters.remove(waiter)
+
+    # Slot diserahkan langsung ke waiter berikutnya (active tetap) agar request baru tidak menyalip antrean
+    def release(self, held=None):
+        if held is not None:
+            self.hold = held if self.hold is None else 0.8 * self.hold + 0.2 * held
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        await self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "queue_limit": self.queue,
+            "deadline": self.deadline,
+            "expected_wait": round(self.expected_wait(), 3),
+        }
+
+# Pool dibagi dua bulkhead agar jumlah keduanya tidak melebihi ukuran pool: koneksi yang dipegang lama
+# (export streaming, sinkronisasi mirror) punya jatah sendiri dan tidak bisa menghabiskan jatah request biasa
+db_background_bulkhead = Bulkhead(
+    "database_background",
+    limit=int(os.environ.get('ADMISSION_DB_BACKGROUND_LIMIT', 1)),
+    queue=int(os.environ.get('ADMISSION_DB_BACKGROUND_QUEUE', 16)),
+    deadline=float(os.environ.get('ADMISSION_DB_BACKGROUND_DEADLINE', 30)),
+)
+db_bulkhead = Bulkhead(
+    "database",
+    limit=int(os.environ.get('ADMISSION_DB_LIMIT', max(1, db_pool.size - db_background_bulkhead.limit))),
+    queue=int(os.environ.get('ADMISSION_DB_QUEUE', 64)),
+    deadline=float(os.environ.get('ADMISSION_DB_DEADLINE', db_pool.timeout)),
+)
+
+# Bulkhead hanya disentuh dari event loop; dari thread threadpool panggilannya dititipkan ke loop lewat anyio
+def call_in_loop(func, *args):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return anyio.from_thread.run_sync(func, *args)
+    return func(*args)
+
+def checkout_admitted(bulkhead):
+    try:
+        conn = db_pool.acquire()
+    except BaseException:
+        call_in_loop(bulkhead.release)
+        raise
+    conn.admission = (bulkhead, time.perf_counter())
+    return conn
+
+# Pinjam koneksi pool lewat admission control, dari thread threadpool (handler sync, run_in_threadpool)
+def acquire_admitted(bulkhead):
+    anyio.from_thread.run(bulkhead.acquire)
+    return checkout_admitted(bulkhead)
+
+# Sama seperti acquire_admitted, untuk kode async: antre di event loop, baru checkout di threadpool
+async def acquire_admitted_async(bulkhead):
+    await bulkhead.acquire()
+    return await run_in_threadpool(checkout_admitted, bulkhead)
+
+def release_admitted(conn, discard=False):
+    bulkhead, started = conn.admission
+    try:
+        db_pool.release(conn, discard)
+    finally:
+        call_in_loop(bulkhead.release, time.perf_counter() - started)
+
+# Koneksi yang baru dipinjam (dan giliran admission yang baru diminta) saat pertama kali dipakai.
+# Request yang selesai tanpa query (304, cache baris/body, hasil single-flight milik request lain)
+# tidak menahan slot pool maupun giliran admission sama sekali, jadi tidak ikut ditolak saat MySQL lambat.
+class LazyConnection:
+    def __init__(self, bulkhead):
+        self._bulkhead = bulkhead
+        self._conn = None
+
+    def __getattr__(self, attr):
+        if self._conn is None:
+            self._conn = acquire_admitted(self._bulkhead)
+        return getattr(self._conn, attr)
+
+    def release(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            release_admitted(conn)
+
+# Dependency untuk meminjam koneksi dari pool, dikembalikan otomatis setelah request selesai
+def get_db():
+    conn = LazyConnection(db_bulkhead)
+    try:
+        yield conn
+    finally:
+        conn.release()
+
+# Single-flight untuk query baca: request bersamaan dengan bentuk query yang sama menunggu
+# satu eksekusi yang sedang berjalan dan memakai hasilnya bersama (termasuk error-nya)
+class SingleFlightCall:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"leaders": 0, "shared": 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlightCall()
+                self.stats["leaders"] += 1
+            else:
+                self.stats["shared"] += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+wisata_reads = SingleFlight()
+
+# Versi data untuk ETag: setiap penulisan wisata menaikkan versi, setiap refresh data upstream
+# menghasilkan hash isi baru. Versi wisata disimpan per proses (EPOCH membedakan proses/restart).
+class DataVersion:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.value += 1
+            return self.value
+
+EPOCH = os.urandom(4).hex()
+wisata_version = DataVersion()
+CACHE_CONTROL = os.environ.get('CACHE_CONTROL', 'no-cache')
+
+def make_etag(*parts):
+    return '"' + hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=16).hexdigest() + '"'
+
+# Jika klien sudah memegang versi terbaru, hentikan request dengan 304 sebelum query atau serialisasi berjalan
+def check_not_modified(request, etag):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        for tag in tags:
+            if tag == "*" or strip_etag_encoding(tag) == etag:
+                raise HTTPException(status_code=304, headers={"ETag": tag if tag != "*" else etag, "Cache-Control": CACHE_CONTROL})
+    return etag
+
+def with_etag(response, etag, *snapshots):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    mark_stale(response, *snapshots)
+    return response
+
+# Tandai respons yang disajikan dari snapshot upstream yang sudah melewati TTL (misal sumber sedang mati)
+def mark_stale(response, *snapshots):
+    stale = [snapshot for snapshot in snapshots if snapshot is not None and snapshot.age() > UPSTREAM_SOURCES[snapshot.name].ttl]
+    if stale:
+        response.headers["X-Data-Stale"] = ", ".join(snapshot.name for snapshot in stale)
+        response.headers["Age"] = str(int(max(snapshot.age() for snapshot in stale)))
+    return response
+
+# Kompresi respons yang dinegosiasikan lewat Accept-Encoding: gzip selalu tersedia, brotli dan zstd bila
+# paketnya terpasang. Body besar yang berasal dari snapshot atau cache berversi dikompresi sekali per versi
+# (level tinggi) lalu dipakai ulang; respons lain dikompresi on-the-fly oleh CompressionMiddleware.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+compression_stats = {"responses": 0, "bytes_in": 0, "bytes_out": 0, "precompressed": 0, "reused": 0}
+
+# Encoder streaming dengan antarmuka sama: chunk() mengeluarkan data yang sudah bisa dikirim, finish() menutup stream.
+# `static` dipakai untuk body yang dikompresi sekali lalu di-cache, sehingga level tinggi sepadan.
+class GzipEncoder:
+    def __init__(self, static=False):
+        self._z = zlib.compressobj(9 if static else int(os.environ.get('COMPRESS_GZIP_LEVEL', 6)), zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data=b""):
+        return self._z.compress(data) + self._z.flush()
+
+class BrotliEncoder:
+    def __init__(self, static=False):
+        self._c = brotli.Compressor(quality=9 if static else int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4)))
+
+    def chunk(self, data):
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self, data=b""):
+        return self._c.process(data) + self._c.finish()
+
+class ZstdEncoder:
+    def __init__(self, static=False):
+        self._c = zstandard.ZstdCompressor(level=12 if static else int(os.environ.get('COMPRESS_ZSTD_LEVEL', 3))).compressobj()
+
+    def chunk(self, data):
+        return self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data=b""):
+        return self._c.compress(data) + self._c.flush()
+
+# Urutan = preferensi server bila klien menerima beberapa encoding dengan q yang sama
+ENCODERS = {}
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+ENCODERS["gzip"] = GzipEncoder
+
+@lru_cache(maxsize=256)
+def negotiate_encoding(accept_encoding):
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODERS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress_body(body, encoding):
+    return ENCODERS[encoding](static=True).finish(body)
+
+# Strong ETag harus berbeda per content-coding; sufiks dibuang lagi saat membandingkan If-None-Match
+def etag_for_encoding(etag, encoding):
+    return etag[:-1] + f'-{encoding}"' if etag.endswith('"') else etag
+
+def strip_etag_encoding(tag):
+    for encoding in ENCODERS:
+        if tag.endswith(f'-{encoding}"'):
+            return tag[:-len(encoding) - 2] + '"'
+    return tag
+
+# Varian terkompresi dari satu body yang tidak berubah (snapshot atau hasil berversi)
+class CompressedVariants:
+    __slots__ = ("_variants",)
+
+    def __init__(self, variants=None):
+        self._variants = dict(variants or {})
+
+    def items(self):
+        return self._variants.items()
+
+    def cached(self, encoding):
+        return self._variants.get(encoding)
+
+    def get(self, body, encoding):
+        data = self._variants.get(encoding)
+        if data is None:
+            data = self._variants[encoding] = compress_body(body, encoding)
+            compression_stats["precompressed"] += 1
+        return data
+
+    def precompute(self, body):
+        if len(body) >= COMPRESS_MIN_SIZE:
+            for encoding in ENCODERS:
+                self.get(body, encoding)
+
+# Body JSON yang sudah di-encode beserta variannya, disimpan di cache per ETag
+class EncodedBody:
+    __slots__ = ("body", "compressed", "cursor")
+
+    def __init__(self, body, cursor=None):
+        self.body = body
+        self.compressed = CompressedVariants()
+        self.cursor = cursor
+
+# Respons JSON yang memilih varian terkompresi saat dikirim (saat itu header request sudah diketahui)
+class PrecompressedResponse(Response):
+    media_type = "application/json"
+
+    def __init__(self, body, variants, **kwargs):
+        super().__init__(body, **kwargs)
+        self.variants = variants
+
+    # Body/varian dari snapshot bersama berupa memoryview ke mmap: dikirim apa adanya tanpa disalin
+    def render(self, content):
+        if isinstance(content, memoryview):
+            return content
+        return super().render(content)
+
+    async def __call__(self, scope, receive, send):
+        body = self.body
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", "")) if len(body) >= COMPRESS_MIN_SIZE else None
+        if encoding is not None:
+            data = self.variants.cached(encoding)
+            if data is None:
+                data = await run_in_threadpool(self.variants.get, body, encoding)
+            else:
+                compression_stats["reused"] += 1
+            compression_stats["responses"] += 1
+            compression_stats["bytes_in"] += len(body)
+            compression_stats["bytes_out"] += len(data)
+            self.body = data
+            self.headers["Content-Length"] = str(len(data))
+            self.headers["Content-Encoding"] = encoding
+            if "etag" in self.headers:
+                self.headers["ETag"] = etag_for_encoding(self.headers["etag"], encoding)
+        self.headers.add_vary_header("Accept-Encoding")
+        await super().__call__(scope, receive, send)
+
+# Kompresi on-the-fly untuk respons yang belum terkompresi, termasuk streaming (ekspor) per chunk
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        start, encoder = None, None
+
+        async def send_compressed(message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if (
+                    "content-encoding" in headers
+                    or start["status"] < 200 or start["status"] in (204, 304)
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < COMPRESS_MIN_SIZE)
+                ):
+                    await send(start)
+                    start = None
+                    return await send(message)
+                encoder = ENCODERS[encoding]()
+                data = encoder.chunk(body) if more_body else encoder.finish(body)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = etag_for_encoding(headers["etag"], encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(data))
+                compression_stats["responses"] += 1
+                await send(start)
+                start = None
+            elif encoder is not None:
+                data = encoder.chunk(body) if more_body else encoder.finish(body)
+            else:
+                return await send(message)
+            compression_stats["bytes_in"] += len(body)
+            compression_stats["bytes_out"] += len(data)
+            await send({**message, "body": data})
+
+        await self.app(scope, receive, send_compressed)
+
+# Dependency ETag untuk endpoint wisata; dideklarasikan sebelum get_db agar 304 tidak meminjam koneksi
+def wisata_etag(request: Request):
+    return check_not_modified(request, make_etag("wisata", EPOCH, wisata_version.value, request.url.path, request.url.query))
+
+# Cache baris wisata (read-through, LRU + TTL) di depan query database.
+# Cache per id diinvalidasi tepat untuk id yang ditulis; cache daftar dikosongkan pada setiap penulisan
+# karena satu baris bisa muncul di halaman/filter mana pun. Id yang tidak ada ikut di-cache (negatif).
+MISSING = object()
+
+class WisataCache:
+    def __init__(self, maxsize_rows, maxsize_lists, ttl):
+        self.rows = TTLCache(maxsize=maxsize_rows, ttl=ttl)
+        self.lists = TTLCache(maxsize=maxsize_lists, ttl=ttl)
+        self.bodies = TTLCache(maxsize=maxsize_lists, ttl=ttl)  # ETag -> EncodedBody siap kirim (daftar dan join)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "negative_hits": 0, "misses": 0, "list_hits": 0, "list_misses": 0, "invalidations": 0}
+
+    def get_row(self, id_wisata, loader):
+        started = time.perf_counter()
+        with self._lock:
+            row = self.rows.get(id_wisata)
+            if row is not None:
+                self.stats["negative_hits" if row is MISSING else "hits"] += 1
+                observe_cache("wisata", "negative_hit" if row is MISSING else "hit", started)
+                return None if row is MISSING else row
+            self.stats["misses"] += 1
+        version = wisata_version.value
+        row = loader()
+        with self._lock:
+            # Jangan simpan hasil yang dibaca sebelum sebuah penulisan selesai
+            if wisata_version.value == version:
+                self.rows[id_wisata] = MISSING if row is None else row
+        observe_cache("wisata", "miss", started)
+        return row
+
+    # Versi banyak id: id yang belum ada di cache dimuat sekaligus oleh `loader(ids)` -> {id: baris}
+    def get_rows(self, ids, loader):
+        started = time.perf_counter()
+        found, missing = {}, []
+        with self._lock:
+            for id_wisata in dict.fromkeys(ids):
+                row = self.rows.get(id_wisata)
+                if row is None:
+                    self.stats["misses"] += 1
+                    missing.append(id_wisata)
+                elif row is MISSING:
+                    self.stats["negative_hits"] += 1
+                else:
+                    self.stats["hits"] += 1
+                    found[id_wisata] = row
+        if missing:
+            version = wisata_version.value
+            loaded = loader(missing)
+            found.update(loaded)
+            with self._lock:
+                if wisata_version.value == version:
+                    for id_wisata in missing:
+                        self.rows[id_wisata] = loaded.get(id_wisata, MISSING)
+        observe_cache("wisata", "miss" if missing else "hit", started)
+        return found
+
+    def get_list(self, key, loader):
+        started = time.perf_counter()
+        with self._lock:
+            rows = self.lists.get(key)
+            if rows is not None:
+                self.stats["list_hits"] += 1
+                observe_cache("wisata_list", "hit", started)
+                return rows
+            self.stats["list_misses"] += 1
+        version = wisata_version.value
+        rows = loader()
+        with self._lock:
+            if wisata_version.value == version:
+                self.lists[key] = rows
+        observe_cache("wisata_list", "miss", started)
+        return rows
+
+    def get_body(self, etag):
+        with self._lock:
+            return self.bodies.get(etag)
+
+    def set_body(self, etag, entry):
+        with self._lock:
+            self.bodies[etag] = entry
+
+    def invalidate(self, ids=None):
+        with self._lock:
+            self.stats["invalidations"] += 1
+            if ids is None:
+                self.rows.clear()
+            else:
+                for id_wisata in ids:
+                    self.rows.pop(id_wisata, None)
+            self.lists.clear()
+            self.bodies.clear()
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["negative_hits"] + self.stats["misses"]
+            list_lookups = self.stats["list_hits"] + self.stats["list_misses"]
+            return {
+                **self.stats,
+                "hit_ratio": (self.stats["hits"] + self.stats["negative_hits"]) / lookups if lookups else None,
+                "list_hit_ratio": self.stats["list_hits"] / list_lookups if list_lookups else None,
+                "rows": len(self.rows),
+                "lists": len(self.lists),
+                "bodies": len(self.bodies),
+            }
+
+wisata_cache = WisataCache(
+    maxsize_rows=int(os.environ.get('WISATA_CACHE_ROWS', 10000)),
+    maxsize_lists=int(os.environ.get('WISATA_CACHE_LISTS', 256)),
+    ttl=float(os.environ.get('WISATA_CACHE_TTL', 60)),
+)
+
+# Kanal pub/sub lokal antar worker uvicorn: setiap worker membuka socket datagram Unix di satu direktori
+# (WISATA_INVALIDATION_DIR) dan mengirim id yang berubah ke socket worker lain
+class InvalidationChannel:
+    # Batas ukuran satu pesan dalam byte (bukan jumlah id, karena id_wisata bisa sampai 255 karakter);
+    # pesan yang lebih besar diganti invalidasi total. Jauh di bawah batas datagram AF_UNIX bawaan Linux.
+    MAX_MESSAGE_BYTES = 32768
+
+    def __init__(self, directory, handler):
+        self.directory = directory
+        self.handler = handler
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self.stats = {"published": 0, "received": 0, "dropped": 0}
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receiver.bind(self.path)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def publish(self, ids):
+        message = orjson.dumps({"ids": list(ids) if ids is not None else None})
+        if len(message) > self.MAX_MESSAGE_BYTES:
+            message = orjson.dumps({"ids": None})
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path == self.path or not name.endswith(".sock"):
+                continue
+            try:
+                self._sender.sendto(message, path)
+                self.stats["published"] += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker sudah mati: bersihkan socket yang tertinggal
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                # Antrian penerima penuh; TTL cache tetap membatasi umur data lama
+                self.stats["dropped"] += 1
+
+    def _listen(self):
+        while True:
+            try:
+                data = self._receiver.recv(self.MAX_MESSAGE_BYTES + 1)
+            except OSError:
+                return
+            self.stats["received"] += 1
+            if len(data) > self.MAX_MESSAGE_BYTES:
+                # Pesan terpotong (pengirim dengan batas lain): daftar id tidak utuh, buang semua
+                self.handler(None)
+                continue
+            try:
+                self.handler(orjson.loads(data)["ids"])
+            except Exception as e:
+                logger.warning("Pesan invalidasi tidak valid: %s", e)
+
+    def close(self):
+        self._receiver.close()
+        self._sender.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+invalidation_channel = None
+
+def apply_invalidation(ids):
+    wisata_version.bump()
+    wisata_cache.invalidate(ids)
+    search_index.invalidate(ids)
+    stats_summary.invalidate(ids)
+
+# Dipanggil setelah penulisan wisata berhasil di-commit: naikkan versi dulu, lalu buang cache
+# (urutan ini mencegah pembaca lama menyimpan ulang data sebelum penulisan), lalu kabari worker lain
+def wisata_changed(*ids):
+    ids = list(ids) if ids else None
+    apply_invalidation(ids)
+    if invalidation_channel is not None:
+        invalidation_channel.publish(ids)
+
+def start_invalidation_channel():
+    global invalidation_channel
+    directory = os.environ.get('WISATA_INVALIDATION_DIR')
+    if directory and invalidation_channel is None:
+        invalidation_channel = InvalidationChannel(directory, apply_invalidation)
+
+def stop_invalidation_channel():
+    global invalidation_channel
+    if invalidation_channel is not None:
+        invalidation_channel.close()
+        invalidation_channel = None
+
 def create_tables(conn):
     cursor = conn.cursor()
     cursor.execute("""
@@ -35,16 +1039,230 @@ def create_tables(conn):
     """)
     conn.commit()
 
+# Daftar migrasi skema berversi, dijalankan berurutan sekali saja saat startup
+MIGRATIONS = [
+    (1, "tabel wisata", [create_tables]),
+    (2, "index untuk list dan filter wisata", [
+        "CREATE INDEX idx_wisata_nama_daerah ON wisata (nama_daerah)",
+        "CREATE INDEX idx_wisata_kategori ON wisata (kategori)",
+        "CREATE INDEX idx_wisata_harga_tiket ON wisata (harga_tiket)",
+    ]),
+    (3, "kolom relasi wisata ke data web hosting lain", [
+        "ALTER TABLE wisata ADD COLUMN id_pajak VARCHAR(255) NULL",
+        "ALTER TABLE wisata ADD COLUMN id_guider VARCHAR(255) NULL",
+        "ALTER TABLE wisata ADD COLUMN id_asuransi VARCHAR(255) NULL",
+        "ALTER TABLE wisata ADD COLUMN RoomID VARCHAR(255) NULL",
+        "ALTER TABLE wisata ADD COLUMN id_bank INT NULL",
+        "CREATE INDEX idx_wisata_id_pajak ON wisata (id_pajak)",
+        "CREATE INDEX idx_wisata_id_guider ON wisata (id_guider)",
+        "CREATE INDEX idx_wisata_id_asuransi ON wisata (id_asuransi)",
+        "CREATE INDEX idx_wisata_room_id ON wisata (RoomID)",
+        "CREATE INDEX idx_wisata_id_bank ON wisata (id_bank)",
+    ]),
+    (4, "index untuk urutan dan filter gabungan daftar wisata", [
+        "CREATE INDEX idx_wisata_nama_objek ON wisata (nama_objek)",
+        "CREATE INDEX idx_wisata_daerah_harga ON wisata (nama_daerah, harga_tiket)",
+        "CREATE INDEX idx_wisata_kategori_harga ON wisata (kategori, harga_tiket)",
+    ]),
+    (5, "tabel mirror data web hosting lain dan status sinkronisasi", [
+        """
+        CREATE TABLE IF NOT EXISTS pajak (
+            id_pajak VARCHAR(255) PRIMARY KEY,
+            status_kepemilikan VARCHAR(255),
+            jenis_pajak VARCHAR(255),
+            tarif_pajak DOUBLE,
+            besar_pajak DOUBLE,
+            urutan INT NOT NULL,
+            row_hash CHAR(32) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tour_guide (
+            id_guider VARCHAR(255) PRIMARY KEY,
+            nama_guider VARCHAR(255),
+            profile TEXT,
+            fee INT,
+            status_ketersediaan VARCHAR(255),
+            urutan INT NOT NULL,
+            row_hash CHAR(32) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS asuransi (
+            id_asuransi VARCHAR(255) PRIMARY KEY,
+            jenis_asuransi VARCHAR(255),
+            urutan INT NOT NULL,
+            row_hash CHAR(32) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS hotel_room (
+            RoomID VARCHAR(255) PRIMARY KEY,
+            RoomNumber VARCHAR(255),
+            RoomType VARCHAR(255),
+            Rate INT,
+            Availability VARCHAR(255),
+            urutan INT NOT NULL,
+            row_hash CHAR(32) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS bank_account (
+            id INT PRIMARY KEY,
+            saldo BIGINT,
+            active_date VARCHAR(255),
+            expired_date VARCHAR(255),
+            urutan INT NOT NULL,
+            row_hash CHAR(32) NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_pajak_jenis_pajak ON pajak (jenis_pajak)",
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            source VARCHAR(64) PRIMARY KEY,
+            table_name VARCHAR(64) NOT NULL,
+            etag CHAR(32),
+            row_count INT,
+            inserted INT,
+            updated INT,
+            deleted INT,
+            fetched_at DOUBLE,
+            error VARCHAR(1024) NULL,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+]
+
+def run_migrations(conn):
+    cursor = conn.cursor()
+    # Lock agar beberapa worker uvicorn tidak menjalankan migrasi yang sama bersamaan
+    cursor.execute("SELECT GET_LOCK('wisata_migrations', 30)")
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise RuntimeError("Gagal mendapatkan lock migrasi skema.")
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(255),
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+        for version, description, steps in MIGRATIONS:
+            if version in applied:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                    continue
+                try:
+                    cursor.execute(step)
+                except mysql.connector.Error as e:
+                    # DDL MySQL tidak transaksional: lewati kolom/index yang sudah terlanjur dibuat
+                    if e.errno not in (1060, 1061):
+                        raise
+            cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)", (version, description))
+            conn.commit()
+        return max([version for version, _, _ in MIGRATIONS])
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('wisata_migrations')")
+        cursor.fetchall()
+        cursor.close()
+
+# Status startup aplikasi, dipakai oleh endpoint readiness
+app_state = {"ready": False, "schema_version": None, "error": None}
+
+def startup_database():
+    conn = db_pool.acquire()
+    try:
+        app_state["schema_version"] = run_migrations(conn)
+    finally:
+        db_pool.release(conn)
+    # Panaskan pool: pinjam semua koneksi sekali agar sudah tersambung dan tercatat umurnya
+    conns = []
+    try:
+        for _ in range(db_pool.size):
+            conns.append(db_pool.acquire())
+    finally:
+        for conn in conns:
+            db_pool.release(conn)
+
+async def startup():
+    try:
+        await run_in_threadpool(startup_database)
+        app_state["ready"] = True
+        app_state["error"] = None
+    except Exception as e:
+        app_state["ready"] = False
+        app_state["error"] = str(getattr(e, "detail", e))
+        logger.error("Startup database gagal: %s", app_state["error"])
+
+@asynccontextmanager
+async def lifespan(app):
+    await startup()
+    start_invalidation_channel()
+    get_http_client()
+    refresher = start_shared_snapshots()
+    mirror_refresher = start_mirror_refresher()
+    await warm_upstream_caches(float(os.environ.get('CACHE_WARMUP_TIMEOUT', 10)))
+    yield
+    if mirror_refresher is not None:
+        mirror_refresher.cancel()
+    await stop_shared_snapshots(refresher)
+    await close_http_client()
+    stop_invalidation_channel()
+
 app = FastAPI(
     title="Objek Wisata",
     description="API untuk mengelola data objek wisata",
     docs_url="/",  # Ubah docs_url menjadi "/"
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 async def read_root():
     return {"Data":"Successful"}
 
+# Endpoint readiness: 200 bila skema sudah siap dan database bisa dihubungi
+@app.get("/ready")
+async def get_ready():
+    if not app_state["ready"]:
+        # Coba ulang startup bila database sebelumnya belum bisa dihubungi
+        await startup()
+    if not app_state["ready"]:
+        return ORJSONResponse(status_code=503, content=app_state)
+    return app_state
+
+# Endpoint untuk melihat statistik cache baris wisata dan kanal invalidasi antar worker
+@app.get("/cache/wisata")
+async def get_wisata_cache_stats():
+    return {
+        **wisata_cache.snapshot(),
+        "search": search_index.snapshot(),
+        "channel": dict(invalidation_channel.stats) if invalidation_channel is not None else None,
+    }
+
+# Endpoint metrik format teks Prometheus
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+# Endpoint untuk melihat antrean dan jumlah request yang ditolak admission control per dependency
+@app.get("/admission")
+async def get_admission_stats():
+    return {name: bulkhead.snapshot() for name, bulkhead in BULKHEADS.items()}
+
+# Endpoint untuk melihat statistik pool koneksi database
+@app.get("/db/pool")
+async def get_db_pool_stats():
+    return {**db_pool.snapshot(), "single_flight": dict(wisata_reads.stats)}
+
 # Model untuk Data Wisata
 class Wisata(BaseModel):
     id_wisata: str
@@ -54,75 +1272,492 @@ class Wisata(BaseModel):
     alamat: str
     kontak: str
     harga_tiket: int
+    # Kolom relasi ke data web hosting lain, dipakai sebagai kunci join
+    id_pajak: Optional[str] = None
+    id_guider: Optional[str] = None
+    id_asuransi: Optional[str] = None
+    RoomID: Optional[str] = None
+    id_bank: Optional[int] = None
+
+WISATA_COLUMNS = ("id_wisata", "nama_objek", "nama_daerah", "kategori", "alamat", "kontak", "harga_tiket",
+                  "id_pajak", "id_guider", "id_asuransi", "RoomID", "id_bank")
+WISATA_SELECT = "SELECT " + ", ".join(WISATA_COLUMNS) + " FROM wisata"
+
+# Fungsi untuk mengambil baris wisata dari database sebagai dict.
+# Hasil dipakai bersama lewat single-flight dan cache, jadi pemanggil tidak boleh mengubah list/dict yang dikembalikan.
+def select_wisata_rows(conn, query=WISATA_SELECT, params=()):
+    return wisata_cache.get_list((query, params), lambda: query_wisata_rows(conn, query, params))
+
+def query_wisata_rows(conn, query, params):
+    def execute():
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = [dict(zip(WISATA_COLUMNS, row)) for row in cursor.fetchall()]
+        cursor.close()
+        return rows
+    # Versi wisata ikut dalam kunci agar pembaca setelah sebuah penulisan tidak menumpang query yang lebih lama
+    return wisata_reads.do((wisata_version.value, query, params), execute)
+
+# Kolom yang boleh dipakai untuk mengurutkan daftar wisata (semuanya punya index)
+WISATA_SORTS = ("id_wisata", "nama_objek", "harga_tiket")
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        return orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, orjson.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor tidak valid.")
+
+# Susun query daftar wisata: filter berparameter + keyset pagination pada (kolom urut, id_wisata)
+def build_wisata_query(limit, cursor=None, nama_daerah=None, kategori=None, harga_min=None, harga_max=None, sort="id_wisata", order="asc"):
+    conditions, params = [], []
+    if nama_daerah is not None:
+        conditions.append("nama_daerah = %s")
+        params.append(nama_daerah)
+    if kategori is not None:
+        conditions.append("kategori = %s")
+        params.append(kategori)
+    if harga_min is not None:
+        conditions.append("harga_tiket >= %s")
+        params.append(harga_min)
+    if harga_max is not None:
+        conditions.append("harga_tiket <= %s")
+        params.append(harga_max)
+    op = ">" if order == "asc" else "<"
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        if not isinstance(position, list) or len(position) != (1 if sort == "id_wisata" else 3) or (sort != "id_wisata" and position[0] != sort):
+            raise HTTPException(status_code=400, detail="Cursor tidak cocok dengan urutan yang diminta.")
+        if sort == "id_wisata":
+            conditions.append(f"id_wisata {op} %s")
+            params.append(position[0])
+        else:
+            conditions.append(f"({sort} {op} %s OR ({sort} = %s AND id_wisata {op} %s))")
+            params.extend([position[1], position[1], position[2]])
+    query = WISATA_SELECT
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    direction = "ASC" if order == "asc" else "DESC"
+    if sort == "id_wisata":
+        query += f" ORDER BY id_wisata {direction}"
+    else:
+        query += f" ORDER BY {sort} {direction}, id_wisata {direction}"
+    # Ambil satu baris lebih untuk mengetahui apakah masih ada halaman berikutnya
+    query += " LIMIT %s"
+    params.append(limit + 1)
+    return query, tuple(params)
+
+def next_cursor(rows, limit, sort):
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    if sort == "id_wisata":
+        return encode_cursor([last["id_wisata"]])
+    return encode_cursor([sort, last[sort], last["id_wisata"]])
+
+# Multi-get: banyak id dalam satu request. Hasil mengikuti urutan id yang diminta,
+# id yang tidak ditemukan tetap punya tempat (null) dan dicantumkan di "missing".
+MGET_MAX_IDS = int(os.environ.get('MGET_MAX_IDS', 1000))
+
+class MultiGet(BaseModel):
+    ids: List[str]
+
+class BankMultiGet(BaseModel):
+    ids: List[int]
 
+# ids dari query string: boleh diulang (?ids=a&ids=b) atau dipisah koma (?ids=a,b)
+def parse_ids(ids, cast=str):
+    try:
+        hasil = [cast(id.strip()) for value in ids for id in value.split(",") if id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Parameter ids tidak valid.")
+    return check_ids(hasil)
+
+def check_ids(ids):
+    if len(ids) > MGET_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Maksimal {MGET_MAX_IDS} id per request.")
+    return ids
 
+def mget_result(ids, found):
+    items = [found.get(id) for id in ids]
+    return {"items": items, "missing": [id for id, item in zip(ids, items) if item is None]}
+
+def mget_snapshot(snapshot, ids):
+    return mget_result(ids, {id: snapshot.get(id) for id in dict.fromkeys(ids)})
 
 @app.get("/wisata", response_model=List[Wisata])
-def get_wisata():
-    conn = get_db_connection()
-    create_tables(conn)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM wisata")
-    data = cursor.fetchall()
-    conn.close()
-    return [Wisata(id_wisata=row[0], nama_objek=row[1], nama_daerah=row[2], kategori=row[3], alamat=row[4], kontak=row[5], harga_tiket=row[6]) for row in data]
+def get_wisata(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    nama_daerah: Optional[str] = None,
+    kategori: Optional[str] = None,
+    harga_min: Optional[int] = None,
+    harga_max: Optional[int] = None,
+    sort: Literal["id_wisata", "nama_objek", "harga_tiket"] = "id_wisata",
+    order: Literal["asc", "desc"] = "asc",
+    ids: Optional[List[str]] = Query(None, description="Ambil id tertentu sekaligus; hasil berbentuk {items, missing}"),
+    etag: str = Depends(wisata_etag),
+    conn=Depends(get_db),
+):
+    if ids:
+        ids = parse_ids(ids)
+        return with_etag(ORJSONResponse(mget_result(ids, get_wisata_many(ids, conn))), etag)
+    # Halaman yang sama pada versi data yang sama (ETag sama) disajikan dari body yang sudah di-encode dan dikompresi
+    entry = wisata_cache.get_body(etag)
+    if entry is None:
+        query, params = build_wisata_query(limit, cursor, nama_daerah, kategori, harga_min, harga_max, sort, order)
+        rows = select_wisata_rows(conn, query, params)
+        # Baris dari database langsung diserialisasi orjson, tanpa membangun dan memvalidasi ulang model per baris
+        entry = EncodedBody(orjson.dumps(rows[:limit]), next_cursor(rows, limit, sort))
+        wisata_cache.set_body(etag, entry)
+    response = PrecompressedResponse(entry.body, entry.compressed)
+    if entry.cursor is not None:
+        response.headers["X-Next-Cursor"] = entry.cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=entry.cursor)}>; rel="next"'
+    return with_etag(response, etag)
 
 @app.post("/wisata")
-def tambah_wisata(wisata: Wisata):
-    conn = get_db_connection()
+def tambah_wisata(wisata: Wisata, conn=Depends(get_db)):
     cursor = conn.cursor()
     
-    query = "INSERT INTO wisata (id_wisata, nama_objek, nama_daerah, kategori, alamat, kontak, harga_tiket) VALUES (%s, %s, %s, %s, %s, %s, %s)"
-    values = (wisata.id_wisata, wisata.nama_objek, wisata.nama_daerah, wisata.kategori, wisata.alamat, wisata.kontak, wisata.harga_tiket)
+    query = "INSERT INTO wisata (" + ", ".join(WISATA_COLUMNS) + ") VALUES (" + ", ".join(["%s"] * len(WISATA_COLUMNS)) + ")"
+    values = tuple(getattr(wisata, column) for column in WISATA_COLUMNS)
     
     try:
         cursor.execute(query, values)
         conn.commit()
+        wisata_changed(wisata.id_wisata)
         return {"message": "Data wisata berhasil ditambahkan."}
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        conn.close()
+        cursor.close()
 
-# Fungsi untuk mendapatkan index data wisata dari database
-def get_wisata_index(id_wisata):
-    conn = get_db_connection()
+# Impor massal: baris divalidasi per chunk lalu ditulis dengan executemany (INSERT multi-baris
+# ... ON DUPLICATE KEY UPDATE) dalam satu transaksi per chunk. Baris yang gagal dilaporkan tanpa membatalkan yang lain.
+WISATA_UPSERT = (
+    "INSERT INTO wisata (" + ", ".join(WISATA_COLUMNS) + ") VALUES (" + ", ".join(["%s"] * len(WISATA_COLUMNS)) + ")"
+    " ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in WISATA_COLUMNS[1:])
+)
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', 500))
+
+# Tulis satu chunk [(nomor_baris, Wisata)], kembalikan daftar error per baris
+def write_wisata_chunk(conn, chunk):
     cursor = conn.cursor()
-    
-    query = "SELECT * FROM wisata WHERE id_wisata = %s"
-    cursor.execute(query, (id_wisata,))
-    data = cursor.fetchone()
-    
-    conn.close()
-    
-    if data:
-        return data
+    try:
+        try:
+            cursor.executemany(WISATA_UPSERT, [tuple(getattr(wisata, column) for column in WISATA_COLUMNS) for _, wisata in chunk])
+            conn.commit()
+            return []
+        except mysql.connector.Error:
+            conn.rollback()
+        # Chunk gagal: ulangi per baris agar hanya baris yang bermasalah yang ditolak
+        errors = []
+        for nomor, wisata in chunk:
+            try:
+                cursor.execute(WISATA_UPSERT, tuple(getattr(wisata, column) for column in WISATA_COLUMNS))
+            except mysql.connector.Error as e:
+                errors.append({"row": nomor, "id_wisata": wisata.id_wisata, "error": str(e)})
+        conn.commit()
+        return errors
+    finally:
+        cursor.close()
+
+async def iter_lines(request):
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+# Baca body sebagai iterator dict per baris: JSON array, NDJSON, atau CSV dengan baris header
+# (CSV dibaca per baris fisik, sehingga nilai berisi baris baru tidak didukung)
+async def iter_bulk_rows(request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        async for line in iter_lines(request):
+            if line.strip():
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError as e:
+                    yield ValueError(f"JSON tidak valid: {e}")
+    elif content_type == "text/csv":
+        header = None
+        async for line in iter_lines(request):
+            text = line.decode("utf-8-sig" if header is None else "utf-8").rstrip("\r")
+            if not text.strip():
+                continue
+            values = next(csv.reader([text]))
+            if header is None:
+                header = values
+                continue
+            yield {column: (value if value != "" else None) for column, value in zip(header, values)}
     else:
-        return None
+        try:
+            data = orjson.loads(await request.body())
+        except orjson.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"JSON tidak valid: {e}")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="Body harus berupa JSON array.")
+        for row in data:
+            yield row
+
+# Tulis satu chunk impor dengan koneksi dari anggaran latar belakang; koneksi hanya dipinjam selama chunk
+# ditulis, tidak selama body diunggah, agar impor yang lambat tidak memakan slot database milik request
+def write_wisata_chunk_admitted(chunk):
+    conn = LazyConnection(db_background_bulkhead)
+    try:
+        return write_wisata_chunk(conn, chunk)
+    finally:
+        conn.release()
+
+# Endpoint untuk menambah atau memperbarui banyak data wisata sekaligus
+@app.post("/wisata/bulk")
+async def tambah_wisata_bulk(request: Request, chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=10000)):
+    diproses, ditulis, errors, chunk = 0, 0, [], []
+
+    async def tulis(chunk):
+        gagal = await run_in_threadpool(write_wisata_chunk_admitted, chunk)
+        ids_gagal = {error["row"] for error in gagal}
+        ids = [wisata.id_wisata for nomor, wisata in chunk if nomor not in ids_gagal]
+        if ids:
+            wisata_changed(*ids)
+        errors.extend(gagal)
+        return len(ids)
+
+    async for row in iter_bulk_rows(request):
+        diproses += 1
+        try:
+            if isinstance(row, Exception):
+                raise row
+            chunk.append((diproses, Wisata.model_validate(row)))
+        except ValidationError as e:
+            errors.append({"row": diproses, "id_wisata": row.get("id_wisata") if isinstance(row, dict) else None, "error": e.errors(include_url=False, include_input=False)})
+        except (ValueError, TypeError) as e:
+            errors.append({"row": diproses, "id_wisata": row.get("id_wisata") if isinstance(row, dict) else None, "error": str(e)})
+        if len(chunk) >= chunk_size:
+            ditulis += await tulis(chunk)
+            chunk = []
+    if chunk:
+        ditulis += await tulis(chunk)
+    errors.sort(key=lambda error: error["row"])
+    return {"message": "Impor data wisata selesai.", "processed": diproses, "written": ditulis, "errors": errors}
+
+# Fungsi untuk mendapatkan index data wisata dari database
+def get_wisata_index(id_wisata, conn):
+    def load():
+        query = WISATA_SELECT + " WHERE id_wisata = %s"
+        data = query_wisata_rows(conn, query, (id_wisata,))
+        
+        if data:
+            return data[0]
+        else:
+            return None
+    return wisata_cache.get_row(id_wisata, load)
+
+# Ambil banyak baris wisata dengan satu query WHERE id_wisata IN (...); id yang sudah ada di cache tidak di-query
+def get_wisata_many(ids, conn):
+    def load(missing):
+        query = WISATA_SELECT + " WHERE id_wisata IN (" + ", ".join(["%s"] * len(missing)) + ")"
+        return {row["id_wisata"]: row for row in query_wisata_rows(conn, query, tuple(missing))}
+    return wisata_cache.get_rows(ids, load)
+
+# Endpoint untuk mengambil banyak data wisata berdasarkan daftar id
+@app.post("/wisata/_mget")
+def mget_wisata(body: MultiGet, conn=Depends(get_db)):
+    ids = check_ids(body.ids)
+    return ORJSONResponse(mget_result(ids, get_wisata_many(ids, conn)))
+
+# Index pencarian di memori (inverted index) atas nama_objek, nama_daerah, kategori dan alamat.
+# Dibangun dari tabel wisata, lalu hanya id yang ditulis (lewat wisata_changed, termasuk pesan dari
+# worker lain) yang dibaca ulang, sehingga pencarian tidak memindahkan seluruh tabel setiap kali.
+# Index juga dibangun ulang penuh setiap SEARCH_INDEX_TTL detik (seperti TTL cache baris), agar tulisan
+# dari worker lain tetap terlihat walau kanal invalidasi tidak aktif atau pesannya hilang.
+SEARCH_FIELDS = {"nama_objek": 3.0, "nama_daerah": 2.0, "kategori": 1.5, "alamat": 1.0}  # bobot per kolom
+SEARCH_PREFIX_FACTOR = 0.6      # kecocokan awalan kata bernilai lebih rendah dari kata yang persis sama
+SEARCH_MAX_EXPANSIONS = int(os.environ.get('SEARCH_MAX_EXPANSIONS', 100))  # batas kata hasil perluasan awalan
+SEARCH_INDEX_TTL = float(os.environ.get('SEARCH_INDEX_TTL', os.environ.get('WISATA_CACHE_TTL', 60)))
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode().lower()
+    return re.findall(r"[a-z0-9]+", text)
+
+class SearchIndex:
+    def __init__(self, ttl):
+        self.ttl = ttl  # detik umur maksimal index sebelum dibangun ulang penuh
+        self._lock = threading.Lock()          # melindungi struktur index
+        self._pending_lock = threading.Lock()  # melindungi daftar perubahan yang belum diterapkan
+        self.docs = {}      # id_wisata -> (baris, token milik baris)
+        self.postings = {}  # token -> {id_wisata: bobot}
+        self.vocab = []     # semua token terurut, untuk pencarian awalan dengan bisect
+        self.built = False
+        self.built_at = 0.0
+        self.dirty = set()
+        self.stats = {"builds": 0, "updates": 0, "searches": 0}
+
+    # Dipanggil dari jalur tulis; tidak menunggu index dibangun, cukup mencatat id yang berubah
+    def invalidate(self, ids):
+        with self._pending_lock:
+            if ids is None:
+                self.built = False
+            else:
+                self.dirty.update(ids)
+
+    def _add(self, row):
+        weights = {}
+        for field, weight in SEARCH_FIELDS.items():
+            for token in tokenize(row.get(field) or ""):
+                weights[token] = max(weights.get(token, 0.0), weight)
+        id_wisata = row["id_wisata"]
+        self.docs[id_wisata] = (row, tuple(weights))
+        for token, weight in weights.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                insort(self.vocab, token)
+            posting[id_wisata] = weight
+
+    def _remove(self, id_wisata):
+        entry = self.docs.pop(id_wisata, None)
+        if entry is None:
+            return
+        for token in entry[1]:
+            posting = self.postings[token]
+            posting.pop(id_wisata, None)
+            if not posting:
+                del self.postings[token]
+                del self.vocab[bisect_left(self.vocab, token)]
+
+    # Terapkan perubahan yang tertunda: bangun penuh bila belum ada atau sudah lewat TTL,
+    # selain itu hanya baca ulang id yang berubah
+    def refresh(self, conn):
+        with self._lock:
+            with self._pending_lock:
+                rebuild = not self.built or time.monotonic() - self.built_at >= self.ttl
+                if rebuild:
+                    self.built, self.built_at = True, time.monotonic()
+                ids, self.dirty = self.dirty, set()
+            if rebuild:
+                try:
+                    rows = query_wisata_rows(conn, WISATA_SELECT, ())
+                except BaseException:
+                    self.invalidate(None)
+                    raise
+                self.docs, self.postings, self.vocab = {}, {}, []
+                for row in rows:
+                    self._add(row)
+                self.stats["builds"] += 1
+            elif ids:
+                found = {}
+                ids = list(ids)
+                try:
+                    for start in range(0, len(ids), 1000):
+                        found.update(get_wisata_many(ids[start:start + 1000], conn))
+                except BaseException:
+                    self.invalidate(ids)  # coba lagi pada pencarian berikutnya
+                    raise
+                for id_wisata in ids:
+                    self._remove(id_wisata)
+                    if id_wisata in found:
+                        self._add(found[id_wisata])
+                self.stats["updates"] += len(ids)
+
+    def _matches(self, term):
+        matches = {}
+        position = bisect_left(self.vocab, term)
+        for token in self.vocab[position:position + SEARCH_MAX_EXPANSIONS]:
+            if not token.startswith(term):
+                break
+            factor = 1.0 if token == term else SEARCH_PREFIX_FACTOR
+            for id_wisata, weight in self.postings[token].items():
+                if weight * factor > matches.get(id_wisata, 0.0):
+                    matches[id_wisata] = weight * factor
+        return matches
+
+    # Semua kata harus cocok (persis atau awalan); skor = jumlah bobot kolom terbaik per kata
+    def search(self, q, nama_daerah=None, kategori=None, harga_min=None, harga_max=None, limit=20, offset=0):
+        terms = list(dict.fromkeys(tokenize(q)))
+        hasil = []
+        with self._lock:
+            self.stats["searches"] += 1
+            scores = None
+            for term in sorted(terms, key=len, reverse=True):  # kata terpanjang biasanya paling selektif
+                matches = self._matches(term)
+                scores = matches if scores is None else {id_wisata: score + matches[id_wisata] for id_wisata, score in scores.items() if id_wisata in matches}
+                if not scores:
+                    break
+            for id_wisata, score in (scores or {}).items():
+                row = self.docs[id_wisata][0]
+                if nama_daerah is not None and (row["nama_daerah"] or "").casefold() != nama_daerah.casefold():
+                    continue
+                if kategori is not None and (row["kategori"] or "").casefold() != kategori.casefold():
+                    continue
+                if harga_min is not None and (row["harga_tiket"] is None or row["harga_tiket"] < harga_min):
+                    continue
+                if harga_max is not None and (row["harga_tiket"] is None or row["harga_tiket"] > harga_max):
+                    continue
+                hasil.append((score, row))
+        teratas = heapq.nsmallest(offset + limit, hasil, key=lambda item: (-item[0], item[1]["nama_objek"] or "", item[1]["id_wisata"]))
+        return len(hasil), [{**row, "score": round(score, 3)} for score, row in teratas[offset:]]
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "built": self.built,
+            "age": round(time.monotonic() - self.built_at, 1) if self.built else None,
+            "documents": len(self.docs),
+            "tokens": len(self.vocab),
+            "pending": len(self.dirty),
+        }
+
+search_index = SearchIndex(SEARCH_INDEX_TTL)
+
+# Endpoint pencarian wisata; didaftarkan sebelum /wisata/{id_wisata} agar "search" tidak dianggap id
+@app.get("/wisata/search")
+def search_wisata(
+    q: str = Query(..., min_length=1, max_length=200, description="Kata kunci; kata terakhir yang belum lengkap tetap cocok sebagai awalan"),
+    nama_daerah: Optional[str] = None,
+    kategori: Optional[str] = None,
+    harga_min: Optional[int] = None,
+    harga_max: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    etag: str = Depends(wisata_etag),
+    conn=Depends(get_db),
+):
+    search_index.refresh(conn)
+    total, items = search_index.search(q, nama_daerah, kategori, harga_min, harga_max, limit, offset)
+    return with_etag(ORJSONResponse({"total": total, "items": items}), etag)
 
 # Endpoint untuk detail get id
 @app.get("/wisata/{id_wisata}", response_model=Optional[Wisata])
-def get_wisata_by_id(id_wisata: str):
-    index = get_wisata_index(id_wisata)
+def get_wisata_by_id(id_wisata: str, etag: str = Depends(wisata_etag), conn=Depends(get_db)):
+    index = get_wisata_index(id_wisata, conn)
     if index:
-        return Wisata(id_wisata=index[0], nama_objek=index[1], nama_daerah=index[2], kategori=index[3], alamat=index[4], kontak=index[5], harga_tiket=index[6])
+        return with_etag(ORJSONResponse(index), etag)
     else:
-        return None
+        return with_etag(ORJSONResponse(None), etag)
 
 # Endpoint untuk memperbarui data wisata dengan hanya memasukkan id_wisata
 @app.put("/wisata/{id_wisata}")
-def update_wisata_by_id(id_wisata: str, wisata_baru: Wisata):
-    conn = get_db_connection()
+def update_wisata_by_id(id_wisata: str, wisata_baru: Wisata, conn=Depends(get_db)):
     cursor = conn.cursor()
     
-    query = "UPDATE wisata SET nama_objek = %s, nama_daerah = %s, kategori = %s, alamat = %s, kontak = %s, harga_tiket = %s WHERE id_wisata = %s"
-    values = (wisata_baru.nama_objek, wisata_baru.nama_daerah, wisata_baru.kategori, wisata_baru.alamat, wisata_baru.kontak, wisata_baru.harga_tiket, id_wisata)
+    query = "UPDATE wisata SET " + ", ".join(f"{column} = %s" for column in WISATA_COLUMNS[1:]) + " WHERE id_wisata = %s"
+    values = tuple(getattr(wisata_baru, column) for column in WISATA_COLUMNS[1:]) + (id_wisata,)
     
     try:
         cursor.execute(query, values)
         conn.commit()
         if cursor.rowcount > 0:
+            wisata_changed(id_wisata)
             return {"message": "Data wisata berhasil diperbarui."}
         else:
             raise HTTPException(status_code=404, detail="Data wisata tidak ditemukan.")
@@ -130,12 +1765,11 @@ def update_wisata_by_id(id_wisata: str, wisata_baru: Wisata):
         conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        conn.close()
+        cursor.close()
 
 # Endpoint untuk menghapus data wisata
 @app.delete("/wisata/{id_wisata}")
-def delete_wisata(id_wisata: str):
-    conn = get_db_connection()
+def delete_wisata(id_wisata: str, conn=Depends(get_db)):
     cursor = conn.cursor()
     
     query = "DELETE FROM wisata WHERE id_wisata = %s"
@@ -144,6 +1778,7 @@ def delete_wisata(id_wisata: str):
         cursor.execute(query, (id_wisata,))
         conn.commit()
         if cursor.rowcount > 0:
+            wisata_changed(id_wisata)
             return {"message": "Data wisata berhasil dihapus."}
         else:
             raise HTTPException(status_code=404, detail="Data wisata tidak ditemukan.")
@@ -151,7 +1786,7 @@ def delete_wisata(id_wisata: str):
         conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        conn.close()
+        cursor.close()
 
 
 
@@ -162,14 +1797,791 @@ def delete_wisata(id_wisata: str):
 
 
 
-# Fungsi untuk mengambil data pajak dari web hosting lain
-def get_data_pajak_from_web():
-    url = "https://api-government.onrender.com/pajak"  # Ganti dengan URL yang sebenarnya
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data PAJAK dari web hosting.")
+# Single-flight versi asyncio: pemanggil bersamaan dengan kunci yang sama menunggu satu task yang sama.
+# Task dilindungi shield, sehingga pembatalan satu pemanggil tidak membatalkan pengambilan milik yang lain.
+class AsyncSingleFlight:
+    def __init__(self):
+        self._tasks = {}
+        self.stats = {"leaders": 0, "shared": 0}
+
+    async def do(self, key, fn):
+        task = self._tasks.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # tandai sudah diambil walau semua pemanggil sudah batal
+
+# Cache di memori untuk data dari web hosting lain (TTL + stale-while-revalidate)
+class UpstreamCache:
+    def __init__(self, maxsize, stale_ttl):
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl  # detik data kedaluwarsa masih boleh disajikan sambil diperbarui
+        self._entries = OrderedDict()  # key -> (data, waktu_ambil)
+        self._refreshing = {}  # key -> task refresh di background
+        self._flights = AsyncSingleFlight()  # satu pengambilan upstream per key, berapa pun jumlah request
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "evictions": 0, "fallbacks": 0}
+
+    async def get(self, key, loader, ttl):
+        started = time.perf_counter()
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            age = now - entry[1]
+            if age < ttl:
+                self.stats["hits"] += 1
+                observe_cache(key, "hit", started)
+                return entry[0]
+            if age < ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                self.refresh_in_background(key, loader)
+                observe_cache(key, "stale", started)
+                return entry[0]
+        self.stats["misses"] += 1
+        # Cache kosong atau sudah terlalu basi: ambil langsung, request lain yang bersamaan ikut menunggu hasil yang sama
+        try:
+            data = await self._flights.do(key, lambda: self._load(key, loader))
+            observe_cache(key, "miss", started)
+            return data
+        except Exception as e:
+            if entry is None:
+                observe_cache(key, "error", started)
+                raise
+            # Sumber gagal: sajikan snapshot terakhir yang berhasil daripada error
+            self.stats["fallbacks"] += 1
+            logger.debug("Memakai data lama untuk %s: %s", key, getattr(e, "detail", e))
+            observe_cache(key, "fallback", started)
+            return entry[0]
+
+    async def _load(self, key, loader):
+        data = await loader()
+        self.set(key, data)
+        return data
+
+    # Ambil isi cache saat ini tanpa memicu refresh atau mengubah statistik
+    def peek(self, key):
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key, data):
+        self._entries[key] = (data, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def refresh_in_background(self, key, loader):
+        task = self._refreshing.get(key)
+        if task is None:
+            # Context baru: waktu refresh background tidak ikut tercatat di Server-Timing request pemicunya
+            task = asyncio.create_task(self._refresh(key, loader), context=contextvars.Context())
+            self._refreshing[key] = task
+        return task
+
+    async def _refresh(self, key, loader):
+        try:
+            await self._flights.do(key, lambda: self._load(key, loader))
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.warning("Gagal memperbarui cache %s: %s", key, getattr(e, "detail", e))
+        finally:
+            self._refreshing.pop(key, None)
+
+    def snapshot(self):
+        now = time.monotonic()
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": (self.stats["hits"] + self.stats["stale_hits"]) / lookups if lookups else None,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "single_flight": dict(self._flights.stats),
+            "entries": {key: {"age": round(now - fetched_at, 1), "rows": len(data)} for key, (data, fetched_at) in self._entries.items()},
+        }
+
+upstream_cache = UpstreamCache(
+    maxsize=int(os.environ.get('CACHE_MAXSIZE', 32)),
+    stale_ttl=float(os.environ.get('CACHE_STALE_TTL', 3600)),
+)
+
+# Satu AsyncClient bersama untuk semua web hosting lain: koneksi keep-alive dipakai ulang
+http_client = None
+
+def get_http_client():
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,  # HTTP/2 bila paket h2 terpasang
+            limits=httpx.Limits(
+                max_connections=int(os.environ.get('UPSTREAM_MAX_CONNECTIONS', 100)),
+                max_keepalive_connections=int(os.environ.get('UPSTREAM_MAX_KEEPALIVE', 20)),
+            ),
+            follow_redirects=True,
+        )
+    return http_client
+
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+# Snapshot data upstream yang tidak diubah lagi setelah dibuat, lengkap dengan hash index id -> posisi.
+# Refresh membuat snapshot baru lalu menggantinya di cache sekaligus, pembaca lama tetap memegang snapshot lamanya.
+class Snapshot:
+    __slots__ = ("name", "rows", "index", "body", "etag", "fetched_at", "compressed")
+
+    def __init__(self, name, rows, key, fetched_at=None):
+        self.name = name
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.rows = tuple(rows)
+        self.body = orjson.dumps(self.rows)  # JSON list sudah di-encode sekali, disajikan apa adanya
+        self.etag = hashlib.blake2b(self.body, digest_size=16).hexdigest()  # hash isi, berubah bila data berubah
+        self.compressed = CompressedVariants()
+        index = {}
+        for position, row in enumerate(self.rows):
+            index.setdefault(row.get(key), position)  # id kembar: ambil yang pertama, sama seperti pencarian linear
+        self.index = MappingProxyType(index)
+
+    def position(self, id):
+        return self.index.get(id)
+
+    def get(self, id):
+        position = self.index.get(id)
+        return self.rows[position] if position is not None else None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+# Snapshot yang dibaca dari file bersama (lihat SharedSnapshotStore): isi tetap di mmap yang dipakai
+# bersama oleh semua worker, baris hanya di-decode saat diminta. Antarmukanya sama dengan Snapshot.
+class MappedSnapshot:
+    __slots__ = ("name", "index", "etag", "fetched_at", "generation", "identity", "compressed", "_map", "_offsets", "_body_at", "_body_end", "_count")
+
+    def __init__(self, name, mapped, header, offsets_at, body_at, identity):
+        self.name = name
+        self.etag = header["etag"]
+        self.fetched_at = header["fetched_at"]
+        self.generation = header["generation"]
+        self.identity = identity  # (inode, mtime) file, berubah setiap kali file diganti
+        self.index = MappingProxyType({id: position for id, position in header["index"]})
+        self._map = mapped
+        self._count = header["count"]
+        self._offsets = memoryview(mapped)[offsets_at:body_at].cast("Q")  # posisi awal tiap baris di body, plus satu penutup
+        self._body_at = body_at
+        self._body_end = body_at + header["body_length"]
+        # Varian terkompresi dari refresher juga tinggal di mmap; encoding yang tidak ada dikompresi per worker
+        self.compressed = CompressedVariants({
+            encoding: memoryview(mapped)[self._body_end + start:self._body_end + end]
+            for encoding, (start, end) in header["variants"].items() if encoding in ENCODERS
+        })
+
+    # Tampilan tanpa salinan ke mmap; PrecompressedResponse mengirimnya langsung
+    @property
+    def body(self):
+        return memoryview(self._map)[self._body_at:self._body_end]
+
+    # Decode seluruh isi: hanya untuk pemakaian sekali per generasi, bukan jalur request (pakai get/index)
+    @property
+    def rows(self):
+        return tuple(orjson.loads(self.body))
+
+    def position(self, id):
+        return self.index.get(id)
+
+    def get(self, id):
+        position = self.index.get(id)
+        if position is None:
+            return None
+        return orjson.loads(self._map[self._body_at + self._offsets[position]:self._body_at + self._offsets[position + 1] - 1])
+
+    def __len__(self):
+        return self._count
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+# Circuit breaker per sumber: setelah `threshold` kegagalan beruntun sumber dianggap mati selama `cooldown`
+# detik (request langsung ditolak tanpa menunggu timeout), lalu satu request percobaan diizinkan (half-open)
+class CircuitBreaker:
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self):
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == "closed"
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def retry_after(self):
+        return max(1, int(self.cooldown - (time.monotonic() - self.opened_at)))
+
+# Catatan latensi terakhir per sumber, dipakai untuk menentukan kapan hedged request dikirim
+class LatencyWindow:
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+HEDGE_MIN_SAMPLES = int(os.environ.get('UPSTREAM_HEDGE_MIN_SAMPLES', 20))
+
+# Sumber data upstream yang di-cache
+class UpstreamSource:
+    def __init__(self, name, fetch, key, model, ttl, connect_timeout, read_timeout, table=None):
+        self.name = name
+        self.fetch = fetch
+        self.key = key  # nama field id untuk index snapshot
+        self.adapter = TypeAdapter(List[model])
+        self.columns = list(model.model_fields)
+        self.table = table  # tabel mirror lokal di MySQL
+        # "live": sajikan data langsung dari web hosting, "mirror": baca dari tabel mirror (join dikerjakan SQL)
+        self.mode = os.environ.get(f'UPSTREAM_MODE_{name.upper()}', os.environ.get('UPSTREAM_MODE', 'live')) if table else 'live'
+        self.ttl = float(os.environ.get(f'CACHE_TTL_{name.upper()}', ttl))
+        self.timeout = httpx.Timeout(
+            float(os.environ.get(f'UPSTREAM_READ_TIMEOUT_{name.upper()}', read_timeout)),
+            connect=float(os.environ.get(f'UPSTREAM_CONNECT_TIMEOUT_{name.upper()}', connect_timeout)),
+        )
+        # Batas waktu total satu pengambilan (termasuk hedged request)
+        self.deadline = float(os.environ.get(f'UPSTREAM_DEADLINE_{name.upper()}', connect_timeout + read_timeout))
+        self.hedge = os.environ.get(f'UPSTREAM_HEDGE_{name.upper()}', os.environ.get('UPSTREAM_HEDGE', '1')) == '1'
+        self.breaker = CircuitBreaker(
+            threshold=int(os.environ.get('UPSTREAM_BREAKER_THRESHOLD', 5)),
+            cooldown=float(os.environ.get('UPSTREAM_BREAKER_COOLDOWN', 30)),
+        )
+        self.latency = LatencyWindow()
+        # Admission control untuk request yang harus menunggu pengambilan saat cache masih kosong
+        self.bulkhead = Bulkhead(
+            name,
+            limit=int(os.environ.get(f'ADMISSION_LIMIT_{name.upper()}', os.environ.get('ADMISSION_UPSTREAM_LIMIT', 16))),
+            queue=int(os.environ.get(f'ADMISSION_QUEUE_{name.upper()}', os.environ.get('ADMISSION_UPSTREAM_QUEUE', 64))),
+            deadline=float(os.environ.get(f'ADMISSION_DEADLINE_{name.upper()}', self.deadline)),
+        )
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0, "hedges": 0, "deadline_exceeded": 0}
+
+    async def _timed_fetch(self):
+        started = time.monotonic()
+        data = await self.fetch()
+        self.latency.add(time.monotonic() - started)
+        return data
+
+    # Kirim request kedua bila request pertama belum selesai setelah p95 latensi; pakai yang lebih dulu berhasil
+    async def _hedged_fetch(self):
+        delay = self.latency.percentile(0.95) if self.hedge and len(self.latency.samples) >= HEDGE_MIN_SAMPLES else None
+        tasks = [asyncio.ensure_future(self._timed_fetch())]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.stats["hedges"] += 1
+                    tasks.append(asyncio.ensure_future(self._timed_fetch()))
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                if not pending:
+                    raise tasks[0].exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    # Pengambilan dengan circuit breaker dan deadline per sumber
+    async def call(self):
+        if not self.breaker.allow():
+            self.stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail=f"Sumber data {self.name} sedang tidak tersedia.", headers={"Retry-After": str(self.breaker.retry_after())})
+        self.stats["calls"] += 1
+        try:
+            data = await asyncio.wait_for(self._hedged_fetch(), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            self.stats["failures"] += 1
+            self.stats["deadline_exceeded"] += 1
+            self.breaker.record_failure()
+            raise HTTPException(status_code=504, detail=f"Sumber data {self.name} melewati batas waktu {self.deadline:g} detik.")
+        except Exception:
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return data
+
+    def status(self):
+        return {
+            **self.stats,
+            "breaker": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "p50": self.latency.percentile(0.5),
+            "p95": self.latency.percentile(0.95),
+            "deadline": self.deadline,
+        }
+
+    # Lama cache di memori: data mirror dibaca ulang lebih sering agar hasil sinkronisasi cepat terlihat
+    @property
+    def cache_ttl(self):
+        return MIRROR_READ_TTL if self.mode == "mirror" else self.ttl
+
+    # Validasi data sekali saat refresh; request berikutnya tinggal menyajikan hasil snapshot
+    async def load_live(self):
+        data = await self.call()
+        try:
+            rows = [item.model_dump() for item in self.adapter.validate_python(data)]
+        except ValidationError as e:
+            raise HTTPException(status_code=502, detail=f"Data {self.name} dari web hosting tidak valid: {e.error_count()} error validasi.")
+        return Snapshot(self.name, rows, self.key)
+
+    async def load(self):
+        snapshot = None
+        if self.mode == "mirror":
+            snapshot = await run_in_threadpool(read_mirror, self)
+        if snapshot is None:
+            # Mode live, atau mirror belum pernah disinkronkan: ambil langsung dari web hosting
+            snapshot = await self.load_live()
+            # Mode live hanya ikut mengisi mirror bila MIRROR_SYNC=1; mode mirror selalu mengisi tabelnya sendiri
+            if self.table is not None and (MIRROR_SYNC or self.mode == "mirror") and (shared_snapshots is None or shared_snapshots.leader):
+                sync_mirror_in_background(self, snapshot)
+        # Kompres sekali di sini (di luar event loop), bukan saat request pertama yang memintanya;
+        # hasilnya ikut ditulis ke file snapshot bersama sehingga worker lain tidak mengompres ulang
+        await run_in_threadpool(snapshot.compressed.precompute, snapshot.body)
+        if shared_snapshots is not None and shared_snapshots.leader:
+            await run_in_threadpool(shared_snapshots.publish, snapshot)
+        return snapshot
+
+UPSTREAM_SOURCES = {}
+
+def upstream_source(name, key, model, ttl, connect_timeout=5, read_timeout=30, table=None):
+    def register(fetch):
+        UPSTREAM_SOURCES[name] = UpstreamSource(name, fetch, key, model, ttl, connect_timeout, read_timeout, table)
+        return fetch
+    return register
+
+def snapshot_response(snapshot, etag):
+    return with_etag(PrecompressedResponse(snapshot.body, snapshot.compressed), etag, snapshot)
+
+# Dependency ETag untuk endpoint data upstream, diturunkan dari hash isi snapshot
+def upstream_etag(name):
+    async def dependency(request: Request):
+        snapshot = await get_upstream_snapshot(name)
+        return check_not_modified(request, make_etag(name, snapshot.etag, request.url.path, request.url.query))
+    return dependency
+
+# Request GET ke web hosting lain memakai client bersama dan timeout milik sumber tersebut
+async def upstream_get(name, url, label):
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = await get_http_client().get(url, timeout=UPSTREAM_SOURCES[name].timeout)
+        status = str(response.status_code)
+        upstream_response_bytes.inc(len(response.content), name)
+        return response
+    except httpx.TimeoutException:
+        status = "timeout"
+        raise HTTPException(status_code=504, detail=f"Timeout saat mengambil data {label} dari web hosting.")
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail=f"Gagal mengambil data {label} dari web hosting.")
+    finally:
+        elapsed = time.perf_counter() - started
+        upstream_request_seconds.observe(elapsed, name, status)
+        record_timing("upstream", elapsed)
+
+async def get_upstream_snapshot(name):
+    source = UPSTREAM_SOURCES[name]
+    if shared_snapshots is not None and not shared_snapshots.leader:
+        snapshot = shared_snapshots.get(name)
+        if snapshot is not None:
+            return snapshot
+    if upstream_cache.peek(name) is not None:
+        return await upstream_cache.get(name, source.load, source.cache_ttl)
+    # Cache kosong: request ikut menunggu pengambilan, dibatasi per sumber agar tidak menumpuk tanpa batas
+    async with source.bulkhead.admit():
+        return await upstream_cache.get(name, source.load, source.cache_ttl)
+
+# Snapshot saat ini tanpa memicu pengambilan, untuk penanda data basi
+def peek_upstream_snapshot(name):
+    if shared_snapshots is not None and not shared_snapshots.leader:
+        snapshot = shared_snapshots.get(name)
+        if snapshot is not None:
+            return snapshot
+    return upstream_cache.peek(name)
+
+async def get_upstream_data(name):
+    return (await get_upstream_snapshot(name)).rows
+
+# Isi cache semua sumber secara paralel; tunggu paling lama `timeout` detik, sisanya lanjut di background
+async def warm_upstream_caches(timeout):
+    if shared_snapshots is not None and not shared_snapshots.leader:
+        return  # data diambil oleh worker refresher
+    tasks = [upstream_cache.refresh_in_background(name, source.load) for name, source in UPSTREAM_SOURCES.items()]
+    if tasks:
+        await asyncio.wait(tasks, timeout=timeout)
+
+# Snapshot upstream bersama antar worker uvicorn (aktif bila SNAPSHOT_DIR diisi).
+# Satu worker memegang flock dan menjadi satu-satunya yang mengambil data dari web hosting lain; setiap
+# refresh ditulis sebagai file <nama>.snap yang tidak pernah diubah lagi (tulis ke file sementara lalu
+# os.replace). Worker lain me-mmap file tersebut read-only dan memetakan ulang bila file diganti.
+# Format: MAGIC, panjang header (u64), header JSON, offset baris (u64 x count+1), body JSON list,
+# lalu varian body terkompresi (posisi masing-masing dicatat di header, relatif terhadap akhir body).
+SNAPSHOT_MAGIC = b"WSNAP002"
+
+class SharedSnapshotStore:
+    def __init__(self, directory, poll):
+        self.directory = directory
+        self.poll = poll  # detik minimal antar pengecekan file oleh worker pembaca
+        self.leader = False
+        self._lock_fd = None
+        self._mapped = {}   # nama -> MappedSnapshot
+        self._checked = {}  # nama -> waktu pengecekan terakhir
+        self.stats = {"published": 0, "reloads": 0, "leader_changes": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.snap")
+
+    # Coba menjadi refresher; lock dilepas otomatis oleh kernel bila proses pemegangnya mati
+    def try_lead(self):
+        if self.leader:
+            return True
+        fd = os.open(os.path.join(self.directory, "refresher.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self.leader = True
+        self.stats["leader_changes"] += 1
+        logger.info("Worker %s menjadi refresher snapshot upstream", os.getpid())
+        return True
+
+    def publish(self, snapshot):
+        current = self.get(snapshot.name, force=True)
+        encoded = [orjson.dumps(row) for row in snapshot.rows]
+        offsets, position = array("Q"), 1
+        for data in encoded:
+            offsets.append(position)
+            position += len(data) + 1  # diikuti "," atau "]"
+        offsets.append(position)
+        body = b"[" + b",".join(encoded) + b"]"
+        variants, end = {}, 0
+        for encoding, data in snapshot.compressed.items():
+            variants[encoding] = (end, end + len(data))
+            end += len(data)
+        header = orjson.dumps({
+            "name": snapshot.name,
+            "generation": (current.generation if current is not None else 0) + 1,
+            "fetched_at": snapshot.fetched_at,
+            "etag": snapshot.etag,
+            "count": len(encoded),
+            "body_length": len(body),
+            "variants": variants,
+            "index": list(snapshot.index.items()),
+        })
+        header += b" " * (-(len(SNAPSHOT_MAGIC) + 8 + len(header)) % 8)  # offset baris rata 8 byte
+        tmp = f"{self.path(snapshot.name)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            f.write(offsets.tobytes())
+            f.write(body)
+            for encoding, data in snapshot.compressed.items():
+                f.write(data)
+        os.replace(tmp, self.path(snapshot.name))
+        self.stats["published"] += 1
+
+    # Snapshot terbaru dari file; file hanya di-stat paling sering sekali per `poll` detik
+    def get(self, name, force=False):
+        snapshot = self._mapped.get(name)
+        now = time.monotonic()
+        if not force and snapshot is not None and now - self._checked.get(name, 0) < self.poll:
+            return snapshot
+        self._checked[name] = now
+        try:
+            with open(self.path(name), "rb") as f:
+                stat = os.fstat(f.fileno())
+                identity = (stat.st_ino, stat.st_mtime_ns)
+                if snapshot is not None and snapshot.identity == identity:
+                    return snapshot
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return snapshot
+        if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            logger.warning("File snapshot %s tidak valid", self.path(name))
+            return snapshot
+        header_at = len(SNAPSHOT_MAGIC) + 8
+        header_len = int.from_bytes(mapped[len(SNAPSHOT_MAGIC):header_at], "little")
+        header = orjson.loads(mapped[header_at:header_at + header_len])
+        offsets_at = header_at + header_len
+        snapshot = MappedSnapshot(name, mapped, header, offsets_at, offsets_at + 8 * (header["count"] + 1), identity)
+        self._mapped[name] = snapshot
+        self.stats["reloads"] += 1
+        return snapshot
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "leader": self.leader,
+            "directory": self.directory,
+            "generations": {name: snapshot.generation for name, snapshot in self._mapped.items()},
+        }
+
+    def close(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            self.leader = False
+
+shared_snapshots = None
+
+def start_shared_snapshots():
+    global shared_snapshots
+    directory = os.environ.get('SNAPSHOT_DIR')
+    if directory and shared_snapshots is None:
+        shared_snapshots = SharedSnapshotStore(directory, float(os.environ.get('SNAPSHOT_POLL', 1)))
+        shared_snapshots.try_lead()
+        return asyncio.create_task(run_snapshot_refresher())
+    return None
+
+async def stop_shared_snapshots(task):
+    global shared_snapshots
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    if shared_snapshots is not None:
+        shared_snapshots.close()
+        shared_snapshots = None
+
+# Loop refresher: worker pembaca terus mencoba mengambil alih lock (bila refresher mati),
+# refresher memperbarui setiap sumber yang file snapshotnya sudah melewati TTL
+async def run_snapshot_refresher():
+    retry = float(os.environ.get('SNAPSHOT_RETRY', 10))
+    attempted = {}
+    while True:
+        if shared_snapshots.try_lead():
+            now = time.monotonic()
+            for name, source in UPSTREAM_SOURCES.items():
+                snapshot = shared_snapshots.get(name)
+                if (snapshot is None or snapshot.age() >= source.ttl) and now - attempted.get(name, -retry) >= retry:
+                    attempted[name] = now
+                    upstream_cache.refresh_in_background(name, source.load)
+        await asyncio.sleep(shared_snapshots.poll)
+
+# Mirror lokal data web hosting lain di MySQL (tabel pajak, tour_guide, asuransi, hotel_room, bank_account).
+# Setiap snapshot baru dibandingkan dengan isi tabel lewat hash isi per baris: hanya baris yang berubah
+# yang di-upsert dan baris yang hilang dihapus. Posisi (urutan) dibandingkan terpisah, sehingga baris yang
+# hanya bergeser posisinya cukup diperbarui kolom urutan-nya. Status terakhir per sumber dicatat di sync_state.
+# Opt-in: dengan MIRROR_SYNC=1 sumber mode live juga disalin ke tabel mirror setiap kali di-refresh.
+# Sinkronisasi memakai jatah database_background (default satu koneksi), jadi berjalan satu per satu.
+MIRROR_SYNC = os.environ.get('MIRROR_SYNC', '0') == '1'
+MIRROR_READ_TTL = float(os.environ.get('MIRROR_READ_TTL', 5))
+MIRROR_CHUNK_SIZE = int(os.environ.get('MIRROR_CHUNK_SIZE', 500))
+mirror_stats = {"syncs": 0, "unchanged": 0, "skipped": 0, "errors": 0}
+mirror_tasks = {}  # nama sumber -> task sinkronisasi yang sedang berjalan
+
+def mirror_row_hash(row):
+    return hashlib.blake2b(orjson.dumps(row), digest_size=16).hexdigest()
+
+def sync_mirror(source, snapshot):
+    conn = acquire_admitted(db_background_bulkhead)
+    cursor = conn.cursor()
+    lock = f"mirror_{source.name}"
+    try:
+        # Worker lain sedang menyinkronkan sumber yang sama: lewati, snapshot berikutnya akan menyusul
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (lock,))
+        if cursor.fetchone()[0] != 1:
+            mirror_stats["skipped"] += 1
+            return None
+        try:
+            cursor.execute("SELECT etag FROM sync_state WHERE source = %s", (source.name,))
+            state = cursor.fetchone()
+            if state is not None and state[0] == snapshot.etag:
+                cursor.execute("UPDATE sync_state SET fetched_at = %s, error = NULL WHERE source = %s", (snapshot.fetched_at, source.name))
+                conn.commit()
+                mirror_stats["unchanged"] += 1
+                return {"inserted": 0, "updated": 0, "moved": 0, "deleted": 0}
+
+            cursor.execute(f"SELECT {source.key}, row_hash, urutan FROM {source.table}")
+            existing = {id: (row_hash, urutan) for id, row_hash, urutan in cursor.fetchall()}
+            upserts, moved, inserted = [], [], 0
+            for id, position in snapshot.index.items():
+                if id is None:
+                    continue
+                row = snapshot.get(id)
+                row_hash = mirror_row_hash(row)
+                current = existing.get(id)
+                if current is None or current[0] != row_hash:
+                    inserted += current is None
+                    upserts.append(tuple(row.get(column) for column in source.columns) + (position, row_hash))
+                elif current[1] != position:
+                    moved.extend((id, position))
+            deleted = [id for id in existing if id not in snapshot.index]
+
+            columns = source.columns + ["urutan", "row_hash"]
+            upsert = (
+                f"INSERT INTO {source.table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                "ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in columns if column != source.key)
+            )
+            for start in range(0, len(upserts), MIRROR_CHUNK_SIZE):
+                cursor.executemany(upsert, upserts[start:start + MIRROR_CHUNK_SIZE])
+            # Baris yang isinya sama tapi posisinya bergeser: satu UPDATE ... CASE per chunk, hanya kolom urutan
+            for start in range(0, len(moved), 2 * MIRROR_CHUNK_SIZE):
+                chunk = moved[start:start + 2 * MIRROR_CHUNK_SIZE]
+                ids = chunk[::2]
+                cursor.execute(
+                    f"UPDATE {source.table} SET urutan = CASE {source.key} {' '.join(['WHEN %s THEN %s'] * len(ids))} END "
+                    f"WHERE {source.key} IN ({', '.join(['%s'] * len(ids))})",
+                    chunk + ids,
+                )
+            for start in range(0, len(deleted), MIRROR_CHUNK_SIZE):
+                chunk = deleted[start:start + MIRROR_CHUNK_SIZE]
+                cursor.execute(f"DELETE FROM {source.table} WHERE {source.key} IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            result = {"inserted": inserted, "updated": len(upserts) - inserted, "moved": len(moved) // 2, "deleted": len(deleted)}
+            cursor.execute(
+                "INSERT INTO sync_state (source, table_name, etag, row_count, inserted, updated, deleted, fetched_at, error) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NULL) ON DUPLICATE KEY UPDATE "
+                "table_name = VALUES(table_name), etag = VALUES(etag), row_count = VALUES(row_count), inserted = VALUES(inserted), "
+                "updated = VALUES(updated), deleted = VALUES(deleted), fetched_at = VALUES(fetched_at), error = NULL",
+                (source.name, source.table, snapshot.etag, len(snapshot.index), result["inserted"], result["updated"], result["deleted"], snapshot.fetched_at),
+            )
+            conn.commit()
+            mirror_stats["syncs"] += 1
+            return result
+        except mysql.connector.Error as e:
+            conn.rollback()
+            cursor.execute("UPDATE sync_state SET error = %s WHERE source = %s", (str(e)[:1024], source.name))
+            conn.commit()
+            raise
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (lock,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+        release_admitted(conn)
+
+async def run_mirror_sync(source, snapshot):
+    try:
+        return await run_in_threadpool(sync_mirror, source, snapshot)
+    except Exception as e:
+        mirror_stats["errors"] += 1
+        logger.warning("Gagal sinkronisasi mirror %s: %s", source.name, getattr(e, "detail", e))
+
+def sync_mirror_in_background(source, snapshot):
+    if source.name not in mirror_tasks:
+        task = asyncio.create_task(run_mirror_sync(source, snapshot), context=contextvars.Context())
+        task.add_done_callback(lambda _: mirror_tasks.pop(source.name, None))
+        mirror_tasks[source.name] = task
+
+# Baca snapshot dari tabel mirror; None bila sumber belum pernah disinkronkan
+def read_mirror(source):
+    conn = acquire_admitted(db_bulkhead)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT fetched_at FROM sync_state WHERE source = %s AND etag IS NOT NULL", (source.name,))
+        state = cursor.fetchone()
+        if state is None:
+            return None
+        cursor.execute(f"SELECT {', '.join(source.columns)} FROM {source.table} ORDER BY urutan")
+        rows = [dict(zip(source.columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        release_admitted(conn)
+    # Waktu ambil dari web hosting, bukan waktu baca tabel, agar penanda data basi tetap jujur
+    return Snapshot(source.name, rows, source.key, fetched_at=state[0])
+
+# Untuk sumber mode mirror tidak ada request yang mengambil data live, jadi loop ini yang menyinkronkannya
+async def run_mirror_refresher():
+    synced = {}
+    while True:
+        now = time.monotonic()
+        for name, source in UPSTREAM_SOURCES.items():
+            if source.mode != "mirror" or now - synced.get(name, -source.ttl) < source.ttl:
+                continue
+            if shared_snapshots is not None and not shared_snapshots.leader:
+                continue
+            synced[name] = now
+            try:
+                await run_mirror_sync(source, await source.load_live())
+                upstream_cache.refresh_in_background(name, source.load)
+            except Exception as e:
+                logger.warning("Gagal mengambil data %s untuk mirror: %s", name, getattr(e, "detail", e))
+        await asyncio.sleep(1)
+
+def start_mirror_refresher():
+    if any(source.mode == "mirror" for source in UPSTREAM_SOURCES.values()):
+        return asyncio.create_task(run_mirror_refresher())
+    return None
+
+# Endpoint untuk melihat mode setiap sumber dan status sinkronisasi tabel mirror
+@app.get("/mirror/status")
+def get_mirror_status(conn=Depends(get_db)):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT source, table_name, etag, row_count, inserted, updated, deleted, fetched_at, error, synced_at FROM sync_state")
+        state = {row["source"]: row for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return {
+        "stats": mirror_stats,
+        "sources": {name: {"mode": source.mode, "table": source.table, "sync": state.get(name)} for name, source in UPSTREAM_SOURCES.items()},
+    }
+
+# Endpoint untuk melihat status circuit breaker dan latensi setiap sumber data upstream
+@app.get("/upstream/status")
+async def get_upstream_status():
+    return {name: source.status() for name, source in UPSTREAM_SOURCES.items()}
+
+# Endpoint untuk melihat statistik cache data upstream
+@app.get("/cache/stats")
+async def get_cache_stats():
+    return {**upstream_cache.snapshot(), "shared": shared_snapshots.snapshot() if shared_snapshots is not None else None}
+
+
+
+
 
 # Model untuk Data Pajak
 class Pajak(BaseModel):
@@ -179,27 +2591,40 @@ class Pajak(BaseModel):
     tarif_pajak: float
     besar_pajak: float
 
+# Fungsi untuk mengambil data pajak dari web hosting lain
+@upstream_source("pajak", key="id_pajak", model=Pajak, ttl=300, table="pajak")
+async def fetch_data_pajak():
+    url = os.environ.get('UPSTREAM_URL_PAJAK', "https://api-government.onrender.com/pajak")  # Ganti dengan URL yang sebenarnya
+    response = await upstream_get("pajak", url, "PAJAK")
+    if response.status_code == 200:
+        return orjson.loads(response.content)
+    else:
+        raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data PAJAK dari web hosting.")
+
+async def get_data_pajak_from_web():
+    return await get_upstream_data("pajak")
+
 # Endpoint untuk mendapatkan data pajak
 @app.get("/pajak", response_model=List[Pajak])
-def get_pajak():
-    data_pajak = get_data_pajak_from_web()
-    return data_pajak
-
-def get_pajak_index(id_pajak):
-    data_pajak = get_data_pajak_from_web()
-    for index, pajak in enumerate(data_pajak):
-        if pajak['id_pajak'] == id_pajak:
-            return index
-    return None
+async def get_pajak(ids: Optional[List[str]] = Query(None), etag: str = Depends(upstream_etag("pajak"))):
+    snapshot = await get_upstream_snapshot("pajak")
+    if ids:
+        return with_etag(ORJSONResponse(mget_snapshot(snapshot, parse_ids(ids))), etag, snapshot)
+    return snapshot_response(snapshot, etag)
 
-@app.get("/pajak/{id_pajak}", response_model=Optional[Pajak])
-def get_pajak_by_id(id_pajak: str):
-    data_pajak = get_data_pajak_from_web()
-    for pajak in data_pajak:
-        if pajak['id_pajak'] == id_pajak:
-            return Pajak(**pajak)
-    return None
+@app.post("/pajak/_mget")
+async def mget_pajak(body: MultiGet):
+    return ORJSONResponse(mget_snapshot(await get_upstream_snapshot("pajak"), check_ids(body.ids)))
 
+async def get_pajak_index(id_pajak):
+    snapshot = await get_upstream_snapshot("pajak")
+    return snapshot.position(id_pajak)
+
+@app.get("/pajak/{id_pajak}", response_model=Optional[Pajak])
+async def get_pajak_by_id(id_pajak: str, etag: str = Depends(upstream_etag("pajak"))):
+    snapshot = await get_upstream_snapshot("pajak")
+    pajak = snapshot.get(id_pajak)
+    return with_etag(ORJSONResponse(pajak), etag, snapshot)
 
 
 
@@ -211,14 +2636,6 @@ def get_pajak_by_id(id_pajak: str):
 
 
 
-# Fungsi untuk mengambil data tourguide dari web hosting lain
-def get_data_tourGuide_from_web():
-    url = "https://tour-guide-ks4n.onrender.com/tourguide"  # Ganti dengan URL yang sebenarnya
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data TOUR GUIDE dari web hosting.")
 
 # Model untuk Data Tour Guide
 class TourGuide(BaseModel):
@@ -228,26 +2645,41 @@ class TourGuide(BaseModel):
     fee: int
     status_ketersediaan: str
 
+# Fungsi untuk mengambil data tourguide dari web hosting lain
+@upstream_source("tourguide", key="id_guider", model=TourGuide, ttl=300, table="tour_guide")
+async def fetch_data_tourGuide():
+    url = os.environ.get('UPSTREAM_URL_TOURGUIDE', "https://tour-guide-ks4n.onrender.com/tourguide")  # Ganti dengan URL yang sebenarnya
+    response = await upstream_get("tourguide", url, "TOUR GUIDE")
+    if response.status_code == 200:
+        return orjson.loads(response.content)
+    else:
+        raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data TOUR GUIDE dari web hosting.")
+
+async def get_data_tourGuide_from_web():
+    return await get_upstream_data("tourguide")
+
 # Endpoint untuk mendapatkan data Tour Guide
 @app.get("/tourGuide", response_model=List[TourGuide])
-def get_tourGuide():
-    data_tourGuide = get_data_tourGuide_from_web()
-    return data_tourGuide
-
-def get_tourGuide_index(id_guider):
-    data_tourGuide = get_data_tourGuide_from_web()
-    for index, tourGuide in enumerate(data_tourGuide):
-        if tourGuide['id_guider'] == id_guider:
-            return index
-    return None
+async def get_tourGuide(ids: Optional[List[str]] = Query(None), etag: str = Depends(upstream_etag("tourguide"))):
+    snapshot = await get_upstream_snapshot("tourguide")
+    if ids:
+        return with_etag(ORJSONResponse(mget_snapshot(snapshot, parse_ids(ids))), etag, snapshot)
+    return snapshot_response(snapshot, etag)
+
+@app.post("/tourGuide/_mget")
+async def mget_tourGuide(body: MultiGet):
+    return ORJSONResponse(mget_snapshot(await get_upstream_snapshot("tourguide"), check_ids(body.ids)))
+
+async def get_tourGuide_index(id_guider):
+    snapshot = await get_upstream_snapshot("tourguide")
+    return snapshot.position(id_guider)
 
 @app.get("/tourGuide/{id_guider}", response_model=Optional[TourGuide])
-def get_tourGuide_by_id(id_guider: str):
-    data_tourGuide = get_data_tourGuide_from_web()
-    for tourGuide in data_tourGuide:
-        if tourGuide['id_guider'] == id_guider:
-            return TourGuide(**tourGuide)
-    return None
+async def get_tourGuide_by_id(id_guider: str, etag: str = Depends(upstream_etag("tourguide"))):
+    snapshot = await get_upstream_snapshot("tourguide")
+    tourGuide = snapshot.get(id_guider)
+    return with_etag(ORJSONResponse(tourGuide), etag, snapshot)
+
 
 
 
@@ -257,40 +2689,44 @@ def get_tourGuide_by_id(id_guider: str):
 
 
 
+# Model untuk Data Asuransi
+class Asuransi(BaseModel):
+    id_asuransi: str
+    jenis_asuransi: str
 
 # Fungsi untuk mengambil data asuransi dari web hosting lain
-def get_data_asuransi_from_web():
-    url = "https://eai-fastapi.onrender.com/asuransi"  # Ganti dengan URL yang sebenarnya
-    response = requests.get(url)
+@upstream_source("asuransi", key="id_asuransi", model=Asuransi, ttl=3600, table="asuransi")
+async def fetch_data_asuransi():
+    url = os.environ.get('UPSTREAM_URL_ASURANSI', "https://eai-fastapi.onrender.com/asuransi")  # Ganti dengan URL yang sebenarnya
+    response = await upstream_get("asuransi", url, "ASURANSI")
     if response.status_code == 200:
-        return response.json()
+        return orjson.loads(response.content)
     else:
         raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data ASURANSI dari web hosting.")
 
-# Model untuk Data Asuransi
-class Asuransi(BaseModel):
-    id_asuransi: str
-    jenis_asuransi: str
+async def get_data_asuransi_from_web():
+    return await get_upstream_data("asuransi")
 
-def get_asuransi_index(id_asuransi):
-    data_asuransi = get_data_asuransi_from_web()
-    for index, asuransi in enumerate(data_asuransi):
-        if asuransi['id_asuransi'] == id_asuransi:
-            return index
-    return None
+async def get_asuransi_index(id_asuransi):
+    snapshot = await get_upstream_snapshot("asuransi")
+    return snapshot.position(id_asuransi)
 
 @app.get("/asuransi", response_model=List[Asuransi])
-def get_asuransi():
-    data_asuransi = get_data_asuransi_from_web()
-    return data_asuransi
+async def get_asuransi(ids: Optional[List[str]] = Query(None), etag: str = Depends(upstream_etag("asuransi"))):
+    snapshot = await get_upstream_snapshot("asuransi")
+    if ids:
+        return with_etag(ORJSONResponse(mget_snapshot(snapshot, parse_ids(ids))), etag, snapshot)
+    return snapshot_response(snapshot, etag)
+
+@app.post("/asuransi/_mget")
+async def mget_asuransi(body: MultiGet):
+    return ORJSONResponse(mget_snapshot(await get_upstream_snapshot("asuransi"), check_ids(body.ids)))
 
 @app.get("/asuransi/{id_asuransi}", response_model=Optional[Asuransi])
-def get_asuransi_by_id(id_asuransi: str):
-    data_asuransi = get_data_asuransi_from_web()
-    for asuransi in data_asuransi:
-        if asuransi['id_asuransi'] == id_asuransi:
-            return Asuransi(**asuransi)
-    return None
+async def get_asuransi_by_id(id_asuransi: str, etag: str = Depends(upstream_etag("asuransi"))):
+    snapshot = await get_upstream_snapshot("asuransi")
+    asuransi = snapshot.get(id_asuransi)
+    return with_etag(ORJSONResponse(asuransi), etag, snapshot)
 
 
 
@@ -301,15 +2737,6 @@ def get_asuransi_by_id(id_asuransi: str):
 
 
 
-# Fungsi untuk mengambil data hotel dari web hosting lain
-def get_data_hotel_from_web():
-    url = "https://hotelbaru.onrender.com/rooms"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()  
-    else:
-        raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data HOTEL dari web hosting.")
-
 # Model untuk Data Hotel
 class Hotel(BaseModel):
     RoomID: str
@@ -318,18 +2745,35 @@ class Hotel(BaseModel):
     Rate: int
     Availability: str
 
+# Fungsi untuk mengambil data hotel dari web hosting lain
+@upstream_source("hotel", key="RoomID", model=Hotel, ttl=60, table="hotel_room")
+async def fetch_data_hotel():
+    url = os.environ.get('UPSTREAM_URL_HOTEL', "https://hotelbaru.onrender.com/rooms")
+    response = await upstream_get("hotel", url, "HOTEL")
+    if response.status_code == 200:
+        return orjson.loads(response.content)  
+    else:
+        raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data HOTEL dari web hosting.")
+
+async def get_data_hotel_from_web():
+    return await get_upstream_data("hotel")
+
 @app.get("/hotel", response_model=List[Hotel])
-def get_hotel():
-    data_hotel = get_data_hotel_from_web()
-    return data_hotel
+async def get_hotel(ids: Optional[List[str]] = Query(None), etag: str = Depends(upstream_etag("hotel"))):
+    snapshot = await get_upstream_snapshot("hotel")
+    if ids:
+        return with_etag(ORJSONResponse(mget_snapshot(snapshot, parse_ids(ids))), etag, snapshot)
+    return snapshot_response(snapshot, etag)
+
+@app.post("/hotel/_mget")
+async def mget_hotel(body: MultiGet):
+    return ORJSONResponse(mget_snapshot(await get_upstream_snapshot("hotel"), check_ids(body.ids)))
 
 @app.get("/hotel/{RoomID}", response_model=Optional[Hotel])
-def get_hotel_by_id(RoomID: str):
-    data_hotel = get_data_hotel_from_web()
-    for hotel in data_hotel:
-        if hotel['RoomID'] == RoomID:
-            return Hotel(**hotel)
-    return None
+async def get_hotel_by_id(RoomID: str, etag: str = Depends(upstream_etag("hotel"))):
+    snapshot = await get_upstream_snapshot("hotel")
+    hotel = snapshot.get(RoomID)
+    return with_etag(ORJSONResponse(hotel), etag, snapshot)
 
 
 
@@ -340,16 +2784,6 @@ def get_hotel_by_id(RoomID: str):
 
 
 
-# Fungsi untuk mengambil data bank dari web hosting lain
-def get_data_bank_from_web():
-    url = "https://jumantaradev.my.id/api/obj-wisata"  # Ganti dengan URL yang sebenarnya
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        return data['data']['data'] # Mengambil hanya bagian 'data' dari JSON
-    else:
-        raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data BANK dari web hosting.")
-
 # Model untuk Data Bank
 class Bank(BaseModel):
     id: int
@@ -357,25 +2791,40 @@ class Bank(BaseModel):
     active_date: str
     expired_date: str
 
-def get_bank_index(id):
-    data_bank = get_data_bank_from_web()
-    for index, bank in enumerate(data_bank):
-        if bank['id'] == id:
-            return index
-    return None
+# Fungsi untuk mengambil data bank dari web hosting lain
+@upstream_source("bank", key="id", model=Bank, ttl=300, table="bank_account")
+async def fetch_data_bank():
+    url = os.environ.get('UPSTREAM_URL_BANK', "https://jumantaradev.my.id/api/obj-wisata")  # Ganti dengan URL yang sebenarnya
+    response = await upstream_get("bank", url, "BANK")
+    if response.status_code == 200:
+        data = orjson.loads(response.content)
+        return data['data']['data'] # Mengambil hanya bagian 'data' dari JSON
+    else:
+        raise HTTPException(status_code=response.status_code, detail="Gagal mengambil data BANK dari web hosting.")
+
+async def get_data_bank_from_web():
+    return await get_upstream_data("bank")
+
+async def get_bank_index(id):
+    snapshot = await get_upstream_snapshot("bank")
+    return snapshot.position(id)
 
 @app.get("/bank", response_model=List[Bank])
-def get_bank():
-    data_bank = get_data_bank_from_web()
-    return data_bank
+async def get_bank(ids: Optional[List[str]] = Query(None), etag: str = Depends(upstream_etag("bank"))):
+    snapshot = await get_upstream_snapshot("bank")
+    if ids:
+        return with_etag(ORJSONResponse(mget_snapshot(snapshot, parse_ids(ids, int))), etag, snapshot)
+    return snapshot_response(snapshot, etag)
+
+@app.post("/bank/_mget")
+async def mget_bank(body: BankMultiGet):
+    return ORJSONResponse(mget_snapshot(await get_upstream_snapshot("bank"), check_ids(body.ids)))
 
 @app.get("/bank/{id}", response_model=Optional[Bank])
-def get_bank_by_id(id: int):
-    data_bank = get_data_bank_from_web()
-    for bank in data_bank:
-        if bank['id'] == id:
-            return Bank(**bank)
-    return None
+async def get_bank_by_id(id: int, etag: str = Depends(upstream_etag("bank"))):
+    snapshot = await get_upstream_snapshot("bank")
+    bank = snapshot.get(id)
+    return with_etag(ORJSONResponse(bank), etag, snapshot)
 
 
 
@@ -389,48 +2838,132 @@ def get_bank_by_id(id: int):
 
 
 
+# Mesin join berbasis hash table: baris wisata dikelompokkan per kunci join (build),
+# lalu setiap baris data web hosting lain mencari pasangannya dengan satu probe dict (O(n+m))
+def index_join(wisata_rows, wisata_key, snapshot, how="inner"):
+    # Kelompokkan baris wisata per posisi pasangannya di snapshot: hanya baris upstream yang dirujuk
+    # yang di-decode (penting untuk MappedSnapshot), urutan hasil tetap mengikuti urutan data upstream
+    matched, unmatched = {}, []
+    for row in wisata_rows:
+        key = row.get(wisata_key)
+        position = snapshot.position(key) if key is not None else None
+        if position is None:
+            unmatched.append(row)
+        else:
+            matched.setdefault(position, (key, []))[1].append(row)
+    for position in sorted(matched):
+        key, rows = matched[position]
+        probe = snapshot.get(key)
+        for row in rows:
+            yield {**probe, **row}
+    # Left outer join: baris wisata tanpa pasangan tetap dikeluarkan dengan kolom kosong
+    if how == "left":
+        for row in unmatched:
+            yield dict(row)
+
+# Deklarasi join antara tabel wisata dan satu sumber data web hosting lain
+class JoinSpec:
+    def __init__(self, source, wisata_key, model):
+        self.source = source          # nama sumber di UPSTREAM_SOURCES
+        self.wisata_key = wisata_key  # kolom relasi di tabel wisata
+        self.model = model            # model hasil proyeksi
+
+    async def run(self, conn, how="inner", key=None):
+        if UPSTREAM_SOURCES[self.source].mode == "mirror":
+            return await run_in_threadpool(self.run_sql, conn, how, key)
+        snapshot = await get_upstream_snapshot(self.source)
+        if key is None:
+            wisata_rows = await run_in_threadpool(select_wisata_rows, conn)
+        else:
+            # Push-down predikat kunci: satu probe index snapshot dan query wisata dengan WHERE berparameter
+            if snapshot.position(key) is None and how == "inner":
+                return []
+            wisata_rows = await run_in_threadpool(select_wisata_rows, conn, f"{WISATA_SELECT} WHERE {self.wisata_key} = %s", (key,))
+        started = time.perf_counter()
+        hasil = [self.model(**row).model_dump() for row in index_join(wisata_rows, self.wisata_key, snapshot, how)]
+        elapsed = time.perf_counter() - started
+        join_seconds.observe(elapsed, self.source)
+        record_timing("join", elapsed)
+        return hasil
+
+    # Mode mirror: join dikerjakan MySQL memakai index kolom relasi wisata dan primary key tabel mirror
+    def run_sql(self, conn, how="inner", key=None):
+        source = UPSTREAM_SOURCES[self.source]
+        columns = [f"w.{field}" if field in WISATA_COLUMNS else f"m.{field}" for field in self.model.model_fields]
+        query = (
+            f"SELECT {', '.join(columns)} FROM wisata w {'LEFT JOIN' if how == 'left' else 'JOIN'} {source.table} m "
+            f"ON m.{source.key} = w.{self.wisata_key}"
+        )
+        params = ()
+        if key is not None:
+            query += f" WHERE w.{self.wisata_key} = %s"
+            params = (key,)
+        query += " ORDER BY m.urutan IS NULL, m.urutan, w.id_wisata"
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return [self.model(**dict(zip(self.model.model_fields, row))).model_dump() for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    # Join satu batch baris wisata dengan probe langsung ke index snapshot, hasilnya dict siap diserialisasi
+    def project_batch(self, wisata_rows, snapshot, how="inner"):
+        hasil = []
+        for row in wisata_rows:
+            record = snapshot.get(row.get(self.wisata_key))
+            if record is None and how == "inner":
+                continue
+            hasil.append(self.model(**({**record, **row} if record is not None else row)).model_dump())
+        return hasil
+
+JoinType = Literal["inner", "left"]
+
+# Hasil join lengkap di-cache sebagai body siap kirim per ETag (versi wisata + hash snapshot),
+# sehingga request berikutnya tidak menjalankan join, validasi model, maupun kompresi lagi
+async def join_response(spec, etag, how, conn):
+    entry = wisata_cache.get_body(etag)
+    if entry is None:
+        entry = EncodedBody(orjson.dumps(await spec.run(conn, how)))
+        wisata_cache.set_body(etag, entry)
+    return with_etag(PrecompressedResponse(entry.body, entry.compressed), etag, peek_upstream_snapshot(spec.source))
+
+# ETag join diturunkan dari versi kedua input: versi wisata dan hash isi snapshot upstream
+def join_etag(spec):
+    async def dependency(request: Request):
+        snapshot = await get_upstream_snapshot(spec.source)
+        return check_not_modified(request, make_etag("join", EPOCH, wisata_version.value, snapshot.etag, request.url.path, request.url.query))
+    return dependency
+
+
+
+
+
 # Endpoint untuk mendapatkan data wisata beserta informasi pajak
 class WisataPajak(BaseModel):
-    id_pajak: str
+    id_pajak: Optional[str] = None
     id_wisata: str
     nama_objek: str
-    status_kepemilikan: str
-    jenis_pajak: str
-    tarif_pajak: float
-    besar_pajak: int
+    status_kepemilikan: Optional[str] = None
+    jenis_pajak: Optional[str] = None
+    tarif_pajak: Optional[float] = None
+    besar_pajak: Optional[float] = None
+
+JOIN_PAJAK = JoinSpec("pajak", "id_pajak", WisataPajak)
 
 # Endpoint untuk mendapatkan data gabungan objek wisata pajak
 @app.get('/wisataPajak', response_model=List[WisataPajak])
-def get_wisata_pajak():
-    data_pajak = get_data_pajak_from_web()
-
-    # Menggunakan zip_longest untuk menggabungkan data objek wisata dan data pajak
-    gabungan_data = []
-    for wisata, pajak in zip_longest(data_wisata, data_pajak, fillvalue={}):
-        gabungan_data.append(WisataPajak(
-            id_pajak = pajak.get('id_pajak', None),
-            id_wisata = wisata.get('id_wisata', None),
-            nama_objek = wisata.get('nama_objek', None),
-            status_kepemilikan = pajak.get('status_kepemilikan', None),
-            jenis_pajak = pajak.get('jenis_pajak', None),
-            tarif_pajak = pajak.get('tarif_pajak', None),
-            besar_pajak = pajak.get('besar_pajak', None)
-        ))
-
-    return gabungan_data
+async def get_wisata_pajak(how: JoinType = "inner", etag: str = Depends(join_etag(JOIN_PAJAK)), conn=Depends(get_db)):
+    return await join_response(JOIN_PAJAK, etag, how, conn)
 
 # Endpoint untuk mendapatkan data wisata beserta informasi pajak berdasarkan id_pajak
 @app.get('/wisataPajak/{id_pajak}', response_model=List[WisataPajak])
-def get_wisata_pajak_by_id(id_pajak: str):
-    data_pajak = get_data_pajak_from_web()
-    data_wisata_pajak = get_wisata_pajak()
-
-    hasil = [wp for wp in data_wisata_pajak if wp.id_pajak == id_pajak]
+async def get_wisata_pajak_by_id(id_pajak: str, etag: str = Depends(join_etag(JOIN_PAJAK)), conn=Depends(get_db)):
+    hasil = await JOIN_PAJAK.run(conn, key=id_pajak)
 
     if not hasil:
         raise HTTPException(status_code=404, detail="Data wisata dengan id_pajak tersebut tidak ditemukan.")
 
-    return hasil
+    return with_etag(ORJSONResponse(hasil), etag, peek_upstream_snapshot(JOIN_PAJAK.source))
 
 
 
@@ -446,49 +2979,28 @@ class WisataTourGuide(BaseModel):
     alamat: str
     kontak: str
     harga_tiket: int
-    id_guider:str
-    nama_guider: str
-    profile: str
-    fee: int
-    status_ketersediaan: str
+    id_guider: Optional[str] = None
+    nama_guider: Optional[str] = None
+    profile: Optional[str] = None
+    fee: Optional[int] = None
+    status_ketersediaan: Optional[str] = None
+
+JOIN_TOUR_GUIDE = JoinSpec("tourguide", "id_guider", WisataTourGuide)
 
 # Endpoint untuk mendapatkan data gabungan objek wisata dan tour guide
 @app.get('/wisataTourGuide', response_model=List[WisataTourGuide])
-def get_wisata_tourGuide():
-    data_tourGuide = get_data_tourGuide_from_web()
-
-    # Menggunakan zip_longest untuk menggabungkan data objek wisata dan data tour guide
-    gabungan_data = []
-    for wisata, tourGuide in zip_longest(data_wisata, data_tourGuide, fillvalue={}):
-        gabungan_data.append(WisataTourGuide(
-            id_wisata = wisata.get('id_wisata', None),
-            nama_objek = wisata.get('nama_objek', None),
-            nama_daerah = wisata.get('nama_daerah', None),
-            kategori = wisata.get('kategori', None),
-            alamat = wisata.get('alamat', None),
-            kontak = wisata.get('kontak', None),
-            harga_tiket = wisata.get('harga_tiket', None),
-            id_guider = tourGuide.get('id_guider', None),
-            nama_guider = tourGuide.get('nama_guider', None),
-            profile = tourGuide.get('profile', None),
-            fee = tourGuide.get('fee', None),
-            status_ketersediaan = tourGuide.get('status_ketersediaan', None)
-        ))
-
-    return gabungan_data
+async def get_wisata_tourGuide(how: JoinType = "inner", etag: str = Depends(join_etag(JOIN_TOUR_GUIDE)), conn=Depends(get_db)):
+    return await join_response(JOIN_TOUR_GUIDE, etag, how, conn)
 
 # Endpoint untuk mendapatkan data wisata beserta informasi pajak berdasarkan id_pajak
 @app.get('/wisataTourGuide/{id_guider}', response_model=List[WisataTourGuide])
-def get_wisata_tourGuide_by_id(id_guider: str):
-    data_tourGuide = get_data_tourGuide_from_web()
-    data_wisata_tourGuide = get_wisata_tourGuide()
-
-    hasil = [wp for wp in data_wisata_tourGuide if wp.id_guider == id_guider]
+async def get_wisata_tourGuide_by_id(id_guider: str, etag: str = Depends(join_etag(JOIN_TOUR_GUIDE)), conn=Depends(get_db)):
+    hasil = await JOIN_TOUR_GUIDE.run(conn, key=id_guider)
 
     if not hasil:
         raise HTTPException(status_code=404, detail="Data wisata dengan id_guider tersebut tidak ditemukan.")
 
-    return hasil
+    return with_etag(ORJSONResponse(hasil), etag, peek_upstream_snapshot(JOIN_TOUR_GUIDE.source))
 
 
 
@@ -505,40 +3017,25 @@ class WisataAsuransi(BaseModel):
     nama_objek: str
     alamat: str
     kontak: str
-    id_asuransi: str
-    jenis_asuransi: str
+    id_asuransi: Optional[str] = None
+    jenis_asuransi: Optional[str] = None
+
+JOIN_ASURANSI = JoinSpec("asuransi", "id_asuransi", WisataAsuransi)
 
 # Endpoint untuk mendapatkan data gabungan objek wisata dan asuransi
 @app.get('/wisataAsuransi', response_model=List[WisataAsuransi])
-def get_wisata_asuransi():
-    data_asuransi = get_data_asuransi_from_web()
-
-    # Menggunakan zip_longest untuk menggabungkan data objek wisata dan asuransi
-    gabungan_data = []
-    for wisata, asuransi in zip_longest(data_wisata, data_asuransi, fillvalue={}):
-        gabungan_data.append(WisataAsuransi(
-            id_wisata = wisata.get('id_wisata', None),
-            nama_objek = wisata.get('nama_objek', None),
-            alamat = wisata.get('alamat', None),
-            kontak = wisata.get('kontak', None),
-            id_asuransi = asuransi.get('id_asuransi', None),
-            jenis_asuransi = asuransi.get('jenis_asuransi', None)
-        ))
-
-    return gabungan_data
+async def get_wisata_asuransi(how: JoinType = "inner", etag: str = Depends(join_etag(JOIN_ASURANSI)), conn=Depends(get_db)):
+    return await join_response(JOIN_ASURANSI, etag, how, conn)
 
 # Endpoint untuk mendapatkan data wisata beserta informasi pajak berdasarkan id_pajak
 @app.get('/wisataAsuransi/{id_asuransi}', response_model=List[WisataAsuransi])
-def get_wisata_asuransi_by_id(id_asuransi: str):
-    data_asuransi = get_data_asuransi_from_web()
-    data_wisata_asuransi = get_wisata_asuransi()
-
-    hasil = [wp for wp in data_wisata_asuransi if wp.id_asuransi == id_asuransi]
+async def get_wisata_asuransi_by_id(id_asuransi: str, etag: str = Depends(join_etag(JOIN_ASURANSI)), conn=Depends(get_db)):
+    hasil = await JOIN_ASURANSI.run(conn, key=id_asuransi)
 
     if not hasil:
         raise HTTPException(status_code=404, detail="Data wisata dengan id_asuransi tersebut tidak ditemukan.")
 
-    return hasil
+    return with_etag(ORJSONResponse(hasil), etag, peek_upstream_snapshot(JOIN_ASURANSI.source))
 
 
 
@@ -558,48 +3055,28 @@ class WisataHotel(BaseModel):
     alamat: str
     kontak: str
     harga_tiket: int
-    RoomID: str
-    RoomNumber: str
-    RoomType: str
-    Rate: int
-    Availability: str
+    RoomID: Optional[str] = None
+    RoomNumber: Optional[str] = None
+    RoomType: Optional[str] = None
+    Rate: Optional[int] = None
+    Availability: Optional[str] = None
+
+JOIN_HOTEL = JoinSpec("hotel", "RoomID", WisataHotel)
+
 # Endpoint untuk mendapatkan data gabungan objek wisata dan hotel
 @app.get('/wisataHotel', response_model=List[WisataHotel])
-def get_wisata_hotel():
-    data_hotel = get_data_hotel_from_web()
-
-    # Menggunakan zip_longest untuk menggabungkan data objek wisata dan data hotel
-    gabungan_data = []
-    for wisata, hotel in zip_longest(data_wisata, data_hotel, fillvalue={}):
-        gabungan_data.append(WisataHotel(
-            id_wisata = wisata.get('id_wisata', None),
-            nama_objek = wisata.get('nama_objek', None),
-            nama_daerah = wisata.get('nama_daerah', None),
-            kategori = wisata.get('kategori', None),
-            alamat = wisata.get('alamat', None),
-            kontak = wisata.get('kontak', None),
-            harga_tiket = wisata.get('harga_tiket', None),
-            RoomID = hotel.get('RoomID', None),
-            RoomNumber = hotel.get('RoomNumber', None),
-            RoomType = hotel.get('RoomType', None),
-            Rate = hotel.get('Rate', None),
-            Availability = hotel.get('Availability', None)
-        ))
-
-    return gabungan_data
+async def get_wisata_hotel(how: JoinType = "inner", etag: str = Depends(join_etag(JOIN_HOTEL)), conn=Depends(get_db)):
+    return await join_response(JOIN_HOTEL, etag, how, conn)
 
 # Endpoint untuk mendapatkan data wisata beserta informasi pajak berdasarkan id_pajak
 @app.get('/wisataHotel/{RoomID}', response_model=List[WisataHotel])
-def get_wisata_hotel_by_id(RoomID: str):
-    data_hotel = get_data_hotel_from_web()
-    data_wisata_hotel = get_wisata_hotel()
-
-    hasil = [wp for wp in data_wisata_hotel if wp.RoomID == RoomID]
+async def get_wisata_hotel_by_id(RoomID: str, etag: str = Depends(join_etag(JOIN_HOTEL)), conn=Depends(get_db)):
+    hasil = await JOIN_HOTEL.run(conn, key=RoomID)
 
     if not hasil:
         raise HTTPException(status_code=404, detail="Data wisata dengan RoomID tersebut tidak ditemukan.")
 
-    return hasil
+    return with_etag(ORJSONResponse(hasil), etag, peek_upstream_snapshot(JOIN_HOTEL.source))
 
 
 
@@ -615,48 +3092,452 @@ class WisataBank(BaseModel):
     id_wisata: str
     nama_daerah: str
     harga_tiket: int
-    id: int
-    saldo: int
-    active_date: str
-    expired_date: str
-    
+    id: Optional[int] = None
+    saldo: Optional[int] = None
+    active_date: Optional[str] = None
+    expired_date: Optional[str] = None
+
+JOIN_BANK = JoinSpec("bank", "id_bank", WisataBank)
+
 # Endpoint untuk mendapatkan data gabungan objek wisata dan hotel
 @app.get('/wisataBank', response_model=List[WisataBank])
-def get_wisata_bank():
-    data_bank = get_data_bank_from_web()
-
-    # Menggunakan zip_longest untuk menggabungkan data objek wisata dan data hotel
-    gabungan_data = []
-    for wisata, bank in zip_longest(data_wisata, data_bank, fillvalue={}):
-        gabungan_data.append(WisataBank(
-            id_wisata=wisata.get('id_wisata', None),
-            nama_daerah=wisata.get('nama_daerah', None),
-            harga_tiket=wisata.get('harga_tiket', None),
-            id=bank.get('id', None),
-            saldo=bank.get('saldo', None),
-            active_date=bank.get('active_date', None),
-            expired_date=bank.get('expired_date', None)
-        ))
-
-    return gabungan_data
+async def get_wisata_bank(how: JoinType = "inner", etag: str = Depends(join_etag(JOIN_BANK)), conn=Depends(get_db)):
+    return await join_response(JOIN_BANK, etag, how, conn)
 
 # Endpoint untuk mendapatkan data wisata beserta informasi pajak berdasarkan id_pajak
 @app.get('/wisataBank/{id}', response_model=List[WisataBank])
-def get_wisata_bank_by_id(id: int):
-    data_bank = get_data_bank_from_web()
-    data_wisata_bank = get_wisata_bank()
-
-    hasil = [wp for wp in data_wisata_bank if wp.id == id]
+async def get_wisata_bank_by_id(id: int, etag: str = Depends(join_etag(JOIN_BANK)), conn=Depends(get_db)):
+    hasil = await JOIN_BANK.run(conn, key=id)
 
     if not hasil:
         raise HTTPException(status_code=404, detail="Data wisata dengan id_bank tersebut tidak ditemukan.")
 
-    return hasil
+    return with_etag(ORJSONResponse(hasil), etag, peek_upstream_snapshot(JOIN_BANK.source))
+
+
+# Endpoint untuk mendapatkan data lengkap satu objek wisata beserta semua data terkait
+class WisataLengkap(BaseModel):
+    wisata: Wisata
+    pajak: Optional[Pajak] = None
+    tourGuide: Optional[TourGuide] = None
+    asuransi: Optional[Asuransi] = None
+    hotel: Optional[Hotel] = None
+    bank: Optional[Bank] = None
+    status: Dict[str, str]  # per bagian: ok, stale, not_found, timeout, error
+
+# Bagian respons -> (sumber upstream, kolom relasi di tabel wisata)
+LENGKAP_SECTIONS = {
+    "pajak": ("pajak", "id_pajak"),
+    "tourGuide": ("tourguide", "id_guider"),
+    "asuransi": ("asuransi", "id_asuransi"),
+    "hotel": ("hotel", "RoomID"),
+    "bank": ("bank", "id_bank"),
+}
+LENGKAP_DEADLINE = float(os.environ.get('LENGKAP_DEADLINE', 3))
+
+# Koneksi dipinjam dan dikembalikan di thread yang sama, sehingga aman walau request sudah lewat deadline
+def lookup_wisata(id_wisata):
+    conn = LazyConnection(db_bulkhead)
+    try:
+        return get_wisata_index(id_wisata, conn)
+    finally:
+        conn.release()
+
+# Query database dan kelima sumber upstream berjalan bersamaan dengan satu deadline bersama,
+# sehingga latensi halaman = sumber paling lambat (dibatasi deadline), bukan jumlah semuanya
+@app.get("/wisata/{id_wisata}/lengkap", response_model=WisataLengkap)
+async def get_wisata_lengkap(id_wisata: str, timeout: float = Query(LENGKAP_DEADLINE, gt=0, le=30)):
+    db_task = asyncio.ensure_future(run_in_threadpool(lookup_wisata, id_wisata))
+    upstream_tasks = {section: asyncio.ensure_future(get_upstream_snapshot(source)) for section, (source, _) in LENGKAP_SECTIONS.items()}
+    await asyncio.wait([db_task, *upstream_tasks.values()], timeout=timeout)
+    # Pengambilan upstream yang belum selesai tetap berjalan di cache (single-flight), hanya penunggunya yang dibatalkan
+    for task in upstream_tasks.values():
+        if not task.done():
+            task.cancel()
+    if not db_task.done():
+        raise HTTPException(status_code=504, detail="Database tidak merespons sebelum batas waktu.")
+    wisata = db_task.result()
+    if wisata is None:
+        raise HTTPException(status_code=404, detail="Data wisata tidak ditemukan.")
+
+    hasil, status = {"wisata": wisata}, {}
+    for section, (source, column) in LENGKAP_SECTIONS.items():
+        task = upstream_tasks[section]
+        hasil[section] = None
+        if task.cancelled() or not task.done():
+            status[section] = "timeout"
+        elif task.exception() is not None:
+            status[section] = "error"
+        else:
+            snapshot = task.result()
+            record = snapshot.get(wisata.get(column)) if wisata.get(column) is not None else None
+            if record is None:
+                status[section] = "not_found"
+            else:
+                hasil[section] = record
+                status[section] = "stale" if snapshot.age() > UPSTREAM_SOURCES[source].ttl else "ok"
+    hasil["status"] = status
+    return ORJSONResponse(hasil)
+
+
+# Export streaming: baris dibaca dari cursor MySQL tanpa buffer per batch (fetchmany) dan langsung dikirim,
+# sehingga memori puncak dibatasi ukuran batch dan byte pertama terkirim sebelum baris terakhir dibaca
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+class ExportStream:
+    def __init__(self, conn, query, params, batch_size, format, transform=None):
+        self.conn = conn
+        self.query = query
+        self.params = params
+        self.batch_size = batch_size
+        self.format = format
+        self.transform = transform  # fungsi opsional untuk mengubah satu batch baris (misal join)
+        self.finished = False
+        self.released = False
+
+    def _execute(self):
+        cursor = self.conn.cursor(buffered=False)
+        cursor.execute(self.query, self.params)
+        return cursor
+
+    def _fetch(self, cursor):
+        return [dict(zip(WISATA_COLUMNS, row)) for row in cursor.fetchmany(self.batch_size)]
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            release_admitted(self.conn, discard=not self.finished)
+
+    async def iter_bytes(self):
+        try:
+            cursor = await run_in_threadpool(self._execute)
+            first = True
+            if self.format == "json":
+                yield b"["
+            while True:
+                rows = await run_in_threadpool(self._fetch, cursor)
+                if not rows:
+                    self.finished = True
+                    break
+                if self.transform is not None:
+                    rows = self.transform(rows)
+                if not rows:
+                    continue
+                if self.format == "ndjson":
+                    yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+                else:
+                    chunk = b",".join(orjson.dumps(row) for row in rows)
+                    yield chunk if first else b"," + chunk
+                    first = False
+            if self.format == "json":
+                yield b"]"
+            await run_in_threadpool(cursor.close)
+        finally:
+            # Klien memutus koneksi atau terjadi error: kembalikan koneksi ke pool (dibuang bila hasil belum habis).
+            # Pengembalian melakukan I/O MySQL, jadi dijalankan di threadpool; shield agar tetap selesai walau dibatalkan.
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(self.release)
+
+def export_response(stream):
+    return StreamingResponse(stream.iter_bytes(), media_type=EXPORT_MEDIA_TYPES[stream.format], background=BackgroundTask(stream.release))
+
+ExportFormat = Literal["ndjson", "json"]
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+# Endpoint export seluruh data wisata secara streaming (NDJSON atau JSON array)
+@app.get("/export/wisata")
+async def export_wisata(format: ExportFormat = "ndjson", batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=10000)):
+    conn = await acquire_admitted_async(db_background_bulkhead)
+    return export_response(ExportStream(conn, WISATA_SELECT + " ORDER BY id_wisata", (), batch_size, format))
+
+EXPORT_JOINS = {
+    "wisataPajak": JOIN_PAJAK,
+    "wisataTourGuide": JOIN_TOUR_GUIDE,
+    "wisataAsuransi": JOIN_ASURANSI,
+    "wisataHotel": JOIN_HOTEL,
+    "wisataBank": JOIN_BANK,
+}
+
+# Endpoint export data gabungan wisata secara streaming, join dilakukan per batch lewat index snapshot
+@app.get("/export/{dataset}")
+async def export_wisata_join(
+    dataset: Literal["wisataPajak", "wisataTourGuide", "wisataAsuransi", "wisataHotel", "wisataBank"],
+    format: ExportFormat = "ndjson",
+    how: JoinType = "inner",
+    batch_size: int = Query(EXPORT_BATCH_SIZE, ge=1, le=10000),
+):
+    spec = EXPORT_JOINS[dataset]
+    snapshot = await get_upstream_snapshot(spec.source)
+    conn = await acquire_admitted_async(db_background_bulkhead)
+    return export_response(ExportStream(conn, WISATA_SELECT + " ORDER BY id_wisata", (), batch_size, format,
+                                        transform=lambda rows: spec.project_batch(rows, snapshot, how)))
+
+# Ringkasan agregat (materialized) harga tiket dan pajak per daerah, kategori dan jenis pajak.
+# Dibangun sekali secara batch dari tabel wisata yang di-join dengan snapshot pajak; sesudahnya hanya
+# disesuaikan dengan delta: baris wisata yang ditulis (lewat apply_invalidation) dan id_pajak yang isinya
+# berubah di snapshot pajak baru. Tidak ada pemindaian ulang seluruh tabel pada setiap perubahan; hanya
+# setiap STATS_SUMMARY_TTL detik ringkasan dibangun ulang penuh (sama seperti SearchIndex), agar tulisan
+# dari worker lain tetap masuk walau kanal invalidasi tidak aktif atau pesannya hilang.
+STATS_DIMENSIONS = {"total": None, "daerah": "nama_daerah", "kategori": "kategori", "jenis_pajak": "jenis_pajak"}
+STATS_METRICS = ("harga_tiket", "tarif_pajak", "besar_pajak")
+STATS_MAX_PERCENTILES = 10
+STATS_SUMMARY_TTL = float(os.environ.get('STATS_SUMMARY_TTL', os.environ.get('WISATA_CACHE_TTL', 60)))
+STATS_BUILD_WAIT = float(os.environ.get('STATS_BUILD_WAIT', 10))  # detik menunggu ringkasan pertama yang sedang dibangun
+StatsDimension = Literal["total", "daerah", "kategori", "jenis_pajak"]
+
+# Satu kolom angka dalam satu grup: jumlah berjalan dan daftar nilai terurut (untuk min/max/persentil)
+class MetricAggregate:
+    __slots__ = ("total", "values")
+
+    def __init__(self, values=()):
+        self.values = sorted(values)
+        self.total = sum(self.values)
+
+    def add(self, value):
+        insort(self.values, value)
+        self.total += value
+
+    def remove(self, value):
+        del self.values[bisect_left(self.values, value)]
+        self.total -= value
+
+    # Persentil dengan interpolasi linear antar dua peringkat terdekat
+    def percentile(self, p):
+        rank = (len(self.values) - 1) * p / 100
+        lower = int(rank)
+        upper = min(lower + 1, len(self.values) - 1)
+        return self.values[lower] + (self.values[upper] - self.values[lower]) * (rank - lower)
+
+    def describe(self, percentiles):
+        count = len(self.values)
+        if not count:
+            return {"count": 0, "sum": 0, "min": None, "max": None, "avg": None, "percentiles": {}}
+        return {
+            "count": count,
+            "sum": round(self.total, 6),
+            "min": self.values[0],
+            "max": self.values[-1],
+            "avg": round(self.total / count, 6),
+            "percentiles": {f"p{p:g}": round(self.percentile(p), 6) for p in percentiles},
+        }
+
+class GroupAggregate:
+    __slots__ = ("rows", "metrics")
+
+    def __init__(self, rows=0, columns=None):
+        self.rows = rows
+        columns = columns or {}
+        self.metrics = {metric: MetricAggregate(columns.get(metric, ())) for metric in STATS_METRICS}
+
+    def apply(self, fact, sign):
+        self.rows += sign
+        for metric in STATS_METRICS:
+            value = fact[metric]
+            if value is not None:
+                if sign > 0:
+                    self.metrics[metric].add(value)
+                else:
+                    self.metrics[metric].remove(value)
+
+class StatsSummary:
+    def __init__(self, ttl):
+        self.ttl = ttl  # detik umur maksimal ringkasan sebelum dibangun ulang penuh
+        self._lock = threading.Lock()          # melindungi ringkasan
+        self._pending_lock = threading.Lock()  # melindungi daftar perubahan yang belum diterapkan
+        self.facts = {}      # id_wisata -> baris fakta (wisata + kolom pajak hasil join)
+        self.by_pajak = {}   # id_pajak -> {id_wisata}, untuk delta saat data pajak berubah
+        self.pajak = {}      # id_pajak -> (jenis_pajak, tarif_pajak, besar_pajak) dari snapshot terakhir
+        self.pajak_etag = None
+        self.groups = {dimension: {} for dimension in STATS_DIMENSIONS}
+        self.built = False
+        self.built_at = 0.0
+        self.dirty = set()
+        self._refreshing = False
+        self._ready = threading.Event()  # diset setelah ringkasan pertama selesai dibangun
+        self.stats = {"builds": 0, "wisata_updates": 0, "pajak_updates": 0, "queries": 0}
+
+    # Dipanggil dari jalur tulis; sama seperti SearchIndex, hanya mencatat id yang berubah
+    def invalidate(self, ids):
+        with self._pending_lock:
+            if ids is None:
+                self.built = False
+            else:
+                self.dirty.update(ids)
+
+    def _fact(self, row):
+        jenis_pajak, tarif_pajak, besar_pajak = self.pajak.get(row["id_pajak"], (None, None, None))
+        return {
+            "id_pajak": row["id_pajak"],
+            "nama_daerah": row["nama_daerah"],
+            "kategori": row["kategori"],
+            "harga_tiket": row["harga_tiket"],
+            "jenis_pajak": jenis_pajak,
+            "tarif_pajak": tarif_pajak,
+            "besar_pajak": besar_pajak,
+        }
+
+    def _load_pajak(self, snapshot):
+        pajak = {}
+        # Lewat index agar snapshot bersama (mmap) tidak di-decode sebagai satu tuple besar
+        for id_pajak in snapshot.index:
+            row = snapshot.get(id_pajak)
+            pajak[id_pajak] = (row.get("jenis_pajak"), row.get("tarif_pajak"), row.get("besar_pajak"))
+        return pajak
+
+    def _set(self, id_wisata, fact):
+        old = self.facts.pop(id_wisata, None)
+        if old is not None:
+            self.by_pajak.get(old["id_pajak"], set()).discard(id_wisata)
+            for dimension, column in STATS_DIMENSIONS.items():
+                value = old[column] if column else None
+                group = self.groups[dimension][value]
+                group.apply(old, -1)
+                if not group.rows:
+                    del self.groups[dimension][value]
+        if fact is not None:
+            self.facts[id_wisata] = fact
+            if fact["id_pajak"] is not None:
+                self.by_pajak.setdefault(fact["id_pajak"], set()).add(id_wisata)
+            for dimension, column in STATS_DIMENSIONS.items():
+                value = fact[column] if column else None
+                group = self.groups[dimension].get(value)
+                if group is None:
+                    group = self.groups[dimension][value] = GroupAggregate()
+                group.apply(fact, 1)
+
+    # Bangun penuh per batch: kumpulkan kolom angka per grup lalu urutkan sekali per kolom,
+    # bukan insort baris per baris
+    def _build(self, rows, snapshot):
+        self.pajak = self._load_pajak(snapshot)
+        self.facts, self.by_pajak = {}, {}
+        columns = {dimension: {} for dimension in STATS_DIMENSIONS}
+        for row in rows:
+            fact = self.facts[row["id_wisata"]] = self._fact(row)
+            if fact["id_pajak"] is not None:
+                self.by_pajak.setdefault(fact["id_pajak"], set()).add(row["id_wisata"])
+            for dimension, column in STATS_DIMENSIONS.items():
+                group = columns[dimension].setdefault(fact[column] if column else None, {"rows": 0, **{metric: [] for metric in STATS_METRICS}})
+                group["rows"] += 1
+                for metric in STATS_METRICS:
+                    if fact[metric] is not None:
+                        group[metric].append(fact[metric])
+        self.groups = {
+            dimension: {value: GroupAggregate(group["rows"], group) for value, group in groups.items()}
+            for dimension, groups in columns.items()
+        }
+
+    # Terapkan perubahan yang tertunda: delta baris wisata yang ditulis dan delta id_pajak yang berubah.
+    # Baris dibaca dari database tanpa memegang lock apa pun (peminjaman koneksi lewat admission control
+    # menunggu event loop); _lock hanya dipegang saat hasilnya dimasukkan ke ringkasan. Hanya satu refresh
+    # berjalan pada satu waktu, request lain langsung memakai ringkasan yang sudah ada.
+    def refresh(self, conn, snapshot):
+        with self._pending_lock:
+            running = self._refreshing
+            if not running:
+                self._refreshing = True
+                rebuild = not self.built or time.monotonic() - self.built_at >= self.ttl
+                if rebuild:
+                    # id yang tertunda tetap dicatat: bisa jadi ditulis setelah tabel selesai dibaca
+                    self.built, self.built_at, ids = True, time.monotonic(), []
+                else:
+                    ids, self.dirty = list(self.dirty), set()
+        if running:
+            # Ringkasan pertama sedang dibangun request lain: tunggu sebentar, jangan sajikan ringkasan kosong
+            if not self._ready.wait(timeout=STATS_BUILD_WAIT):
+                raise HTTPException(status_code=503, detail="Ringkasan statistik sedang disiapkan, silakan coba lagi.", headers={"Retry-After": "1"})
+            return
+        try:
+            self._refresh(conn, snapshot, rebuild, ids)
+        finally:
+            with self._pending_lock:
+                self._refreshing = False
+
+    def _refresh(self, conn, snapshot, rebuild, ids):
+        found = {}
+        try:
+            if rebuild:
+                rows = query_wisata_rows(conn, WISATA_SELECT, ())
+            for start in range(0, len(ids), 1000):
+                found.update(get_wisata_many(ids[start:start + 1000], conn))
+        except BaseException:
+            self.invalidate(None if rebuild else ids)  # coba lagi pada query berikutnya
+            raise
+        with self._lock:
+            if rebuild:
+                self._build(rows, snapshot)
+                self.pajak_etag = snapshot.etag
+                self.stats["builds"] += 1
+                self._ready.set()
+                return
+            if snapshot.etag != self.pajak_etag:
+                pajak = self._load_pajak(snapshot)
+                changed = [id_pajak for id_pajak in pajak.keys() | self.pajak.keys() if pajak.get(id_pajak) != self.pajak.get(id_pajak)]
+                self.pajak, self.pajak_etag = pajak, snapshot.etag
+                for id_pajak in changed:
+                    for id_wisata in list(self.by_pajak.get(id_pajak, ())):
+                        self._set(id_wisata, self._fact(self.facts[id_wisata]))
+                self.stats["pajak_updates"] += len(changed)
+            with self._pending_lock:
+                pending = set(self.dirty)
+            for id_wisata in ids:
+                if id_wisata in pending:
+                    continue  # ditulis lagi selama dibaca; versi terbarunya dibaca pada refresh berikutnya
+                self._set(id_wisata, self._fact(found[id_wisata]) if id_wisata in found else None)
+            self.stats["wisata_updates"] += len(ids)
+
+    def query(self, dimension, percentiles, group=None):
+        with self._lock:
+            self.stats["queries"] += 1
+            hasil = []
+            for value, aggregate in self.groups[dimension].items():
+                if group is not None and (value or "").casefold() != group.casefold():
+                    continue
+                hasil.append({
+                    "group": value,
+                    "rows": aggregate.rows,
+                    **{metric: aggregate.metrics[metric].describe(percentiles) for metric in STATS_METRICS},
+                })
+        hasil.sort(key=lambda item: (item["group"] is None, item["group"] or ""))
+        return hasil
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "built": self.built,
+            "age": round(time.monotonic() - self.built_at, 1) if self.built else None,
+            "rows": len(self.facts),
+            "groups": {dimension: len(groups) for dimension, groups in self.groups.items()},
+            "pending": len(self.dirty),
+        }
+
+stats_summary = StatsSummary(STATS_SUMMARY_TTL)
+
+# Endpoint statistik ringkasan: jumlah, rata-rata, min/max dan persentil harga tiket dan pajak per grup
+@app.get("/stats/{dimension}")
+async def get_stats(
+    dimension: StatsDimension,
+    group: Optional[str] = None,
+    percentiles: List[float] = Query([50, 90, 99]),
+    etag: str = Depends(join_etag(JOIN_PAJAK)),
+    conn=Depends(get_db),
+):
+    if len(percentiles) > STATS_MAX_PERCENTILES or any(not 0 <= p <= 100 for p in percentiles):
+        raise HTTPException(status_code=400, detail=f"Maksimal {STATS_MAX_PERCENTILES} persentil, masing-masing 0 sampai 100.")
+    snapshot = await get_upstream_snapshot(JOIN_PAJAK.source)
+    await run_in_threadpool(stats_summary.refresh, conn, snapshot)
+    # query() memegang lock ringkasan: jalankan di threadpool, jangan pernah di event loop
+    hasil = await run_in_threadpool(stats_summary.query, dimension, percentiles, group)
+    return with_etag(ORJSONResponse({"dimension": dimension, "groups": hasil}), etag, snapshot)
+
+# Endpoint untuk melihat status ringkasan statistik
+@app.get("/stats")
+async def get_stats_status():
+    return stats_summary.snapshot()
 
 
 if __name__ == "__main__":
     conn = get_db_connection()
-    create_tables(conn)
+    run_migrations(conn)
     conn.close()
     
     